@@ -4,6 +4,11 @@ import pandas as pd
 import numpy as np
 import math
 from typing import Dict, Any
+from app.analytics.column_stats import ColumnStats
+
+# Domain metrics read a handful of named columns, but the general data-quality
+# metrics profile every column, so the loader has to materialize the whole frame
+ADVANCED_METRICS_COLUMNS = None
 
 
 def safe_float(value):
@@ -20,27 +25,28 @@ def safe_int(value):
     return int(value)
 
 
-def calculate_advanced_metrics(df: pd.DataFrame) -> Dict[str, Any]:
+def calculate_advanced_metrics(df: pd.DataFrame, column_stats: ColumnStats = None) -> Dict[str, Any]:
     """Calculate advanced metrics for travel approval or business data"""
     
     advanced_metrics = {}
+    column_stats = column_stats if column_stats is not None else ColumnStats(df)
     
     # Detect data type
     is_travel_data = any(col in df.columns for col in ['approval_status', 'travel_purpose', 'source_state'])
     is_business_data = any(col in df.columns for col in ['revenue_musd', 'industry', 'employees'])
     
     if is_travel_data:
-        advanced_metrics.update(_calculate_travel_metrics(df))
+        advanced_metrics.update(_calculate_travel_metrics(df, column_stats))
     elif is_business_data:
-        advanced_metrics.update(_calculate_business_metrics(df))
+        advanced_metrics.update(_calculate_business_metrics(df, column_stats))
     
     # General advanced metrics
-    advanced_metrics.update(_calculate_general_metrics(df))
+    advanced_metrics.update(_calculate_general_metrics(df, column_stats))
     
     return advanced_metrics
 
 
-def _calculate_travel_metrics(df: pd.DataFrame) -> Dict[str, Any]:
+def _calculate_travel_metrics(df: pd.DataFrame, column_stats: ColumnStats) -> Dict[str, Any]:
     """Calculate travel approval specific metrics"""
     metrics = {}
     
@@ -78,7 +84,7 @@ def _calculate_travel_metrics(df: pd.DataFrame) -> Dict[str, Any]:
     # Geographic analysis
     if 'source_state' in df.columns and 'destination_state' in df.columns:
         # Interstate travel patterns
-        travel_flows = df.groupby(['source_state', 'destination_state']).size().reset_index(name='count')
+        travel_flows = df.groupby(['source_state', 'destination_state'], observed=True).size().reset_index(name='count')
         top_flows = travel_flows.nlargest(10, 'count')
         
         metrics['geographic_analysis'] = {
@@ -95,7 +101,7 @@ def _calculate_travel_metrics(df: pd.DataFrame) -> Dict[str, Any]:
     
     # Demographic analysis
     if 'age' in df.columns:
-        age_stats = df['age'].describe()
+        age_stats = _describe(df, 'age', column_stats)
         metrics['demographic_analysis'] = {
             'age_distribution': {
                 'mean_age': safe_float(age_stats['mean']),
@@ -107,7 +113,7 @@ def _calculate_travel_metrics(df: pd.DataFrame) -> Dict[str, Any]:
     
     # Economic analysis
     if 'monthly_income' in df.columns:
-        income_stats = df['monthly_income'].describe()
+        income_stats = _describe(df, 'monthly_income', column_stats)
         metrics['economic_analysis'] = {
             'income_distribution': {
                 'mean_income': safe_float(income_stats['mean']),
@@ -134,13 +140,13 @@ def _calculate_travel_metrics(df: pd.DataFrame) -> Dict[str, Any]:
     return metrics
 
 
-def _calculate_business_metrics(df: pd.DataFrame) -> Dict[str, Any]:
+def _calculate_business_metrics(df: pd.DataFrame, column_stats: ColumnStats) -> Dict[str, Any]:
     """Calculate business data specific metrics"""
     metrics = {}
     
     # Financial analysis
     if 'revenue_musd' in df.columns:
-        revenue_stats = df['revenue_musd'].describe()
+        revenue_stats = _describe(df, 'revenue_musd', column_stats)
         metrics['financial_analysis'] = {
             'revenue_distribution': {
                 'mean_revenue': safe_float(revenue_stats['mean']),
@@ -152,7 +158,7 @@ def _calculate_business_metrics(df: pd.DataFrame) -> Dict[str, Any]:
     
     # Growth analysis
     if 'growth_rate' in df.columns:
-        growth_stats = df['growth_rate'].describe()
+        growth_stats = _describe(df, 'growth_rate', column_stats)
         metrics['growth_analysis'] = {
             'average_growth': safe_float(growth_stats['mean']),
             'growth_leaders': df.nlargest(5, 'growth_rate')[['company', 'growth_rate']].to_dict('records') if 'company' in df.columns else None
@@ -169,14 +175,14 @@ def _calculate_business_metrics(df: pd.DataFrame) -> Dict[str, Any]:
     return metrics
 
 
-def _calculate_general_metrics(df: pd.DataFrame) -> Dict[str, Any]:
+def _calculate_general_metrics(df: pd.DataFrame, column_stats: ColumnStats) -> Dict[str, Any]:
     """Calculate general data quality and structure metrics"""
     metrics = {}
     
     # Data completeness analysis
-    missing_by_column = df.isnull().sum()
-    total_cells = df.shape[0] * df.shape[1]
-    total_missing = df.isnull().sum().sum()
+    missing_by_column = column_stats.missing
+    total_cells = column_stats.row_count * column_stats.column_count
+    total_missing = column_stats.total_missing
     
     metrics['data_quality'] = {
         'completeness_score': safe_float(((total_cells - total_missing) / total_cells) * 100) if total_cells > 0 else 0,
@@ -188,15 +194,15 @@ def _calculate_general_metrics(df: pd.DataFrame) -> Dict[str, Any]:
     type_counts = df.dtypes.value_counts()
     metrics['data_structure'] = {
         'column_types': {str(dtype): int(count) for dtype, count in type_counts.items()},
-        'numeric_columns': len(df.select_dtypes(include=[np.number]).columns),
-        'categorical_columns': len(df.select_dtypes(include=['object', 'category']).columns),
-        'datetime_columns': len(df.select_dtypes(include=['datetime64']).columns)
+        'numeric_columns': len(column_stats.numeric_columns),
+        'categorical_columns': len(column_stats.categorical_columns),
+        'datetime_columns': len(column_stats.datetime_columns)
     }
     
     # Uniqueness analysis
     uniqueness_scores = {}
     for col in df.columns:
-        unique_ratio = df[col].nunique() / len(df) if len(df) > 0 else 0
+        unique_ratio = column_stats.unique[col] / len(df) if len(df) > 0 else 0
         uniqueness_scores[col] = safe_float(unique_ratio)
     
     metrics['uniqueness_analysis'] = {
@@ -208,6 +214,22 @@ def _calculate_general_metrics(df: pd.DataFrame) -> Dict[str, Any]:
     return metrics
 
 
+def _describe(df: pd.DataFrame, col: str, column_stats: ColumnStats):
+    """mean, median (50%), min and max of a column; the median comes from the batched
+    quantiles when statistics or outlier detection already computed them"""
+    series = df[col]
+    quantiles = column_stats.computed_quantiles()
+    if quantiles is None or col not in quantiles.index:
+        return series.describe()
+
+    return {
+        'mean': series.mean(),
+        '50%': quantiles.at[col, 'p50'],
+        'min': series.min(),
+        'max': series.max()
+    }
+
+
 def _calculate_age_groups(age_series: pd.Series) -> Dict[str, int]:
     """Calculate age group distribution"""
     age_groups = {
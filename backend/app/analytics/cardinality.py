@@ -0,0 +1,31 @@
+# app/analytics/cardinality.py
+
+from typing import Optional, Tuple
+
+# Text columns with at most this many distinct values are analysed as they are
+MAX_LEVELS = 50
+
+# Most frequent levels a bucketed column keeps; the rest are folded into "other"
+TOP_LEVELS = 20
+
+# Distinct values per non-null row from which a column is treated as an identifier
+IDENTIFIER_RATIO = 0.9
+
+# Share of non-null rows the kept levels must cover, below which a column is free text
+MIN_TOP_SHARE = 0.5
+
+
+def plan_column(unique: int, non_null: int, top_share: float) -> Tuple[str, Optional[str]]:
+    """Decide how a text column enters categorical analysis from its distinct count, its
+    non-null count and the share of rows its TOP_LEVELS most frequent values cover.
+
+    Returns ("keep", None), ("bucket", None) or ("prune", reason), where reason is
+    "identifier" (names, application numbers) or "free_text".
+    """
+    if unique <= MAX_LEVELS:
+        return "keep", None
+    if non_null > 0 and unique >= IDENTIFIER_RATIO * non_null:
+        return "prune", "identifier"
+    if top_share < MIN_TOP_SHARE:
+        return "prune", "free_text"
+    return "bucket", None
@@ -1,20 +1,35 @@
 import pandas as pd
+from app.analytics.cardinality import TOP_LEVELS, plan_column
+from app.analytics.column_stats import ColumnStats
 
 
-def categorical_statistics(df: pd.DataFrame, top_n: int = 8):
+def categorical_statistics(df: pd.DataFrame, top_n: int = 8, column_stats: ColumnStats = None):
     results = {}
 
-    categorical_cols = df.select_dtypes(include=["object", "category"]).columns
-    total_rows = len(df)
+    column_stats = column_stats if column_stats is not None else ColumnStats(df)
+    total_rows = column_stats.row_count
 
-    for col in categorical_cols:
-        series = df[col].dropna()
+    for col in column_stats.categorical_columns:
+        value_counts = column_stats.value_counts[col]
 
-        if series.empty:
+        if value_counts.empty:
             continue
 
-        value_counts = series.value_counts()
-        unique_count = int(series.nunique())
+        unique_count = int(column_stats.unique[col])
+        non_null = total_rows - int(column_stats.missing[col])
+        top_share = value_counts.head(TOP_LEVELS).sum() / non_null if non_null > 0 else 1.0
+        action, reason = plan_column(unique_count, non_null, top_share)
+
+        if action == "prune":
+            # Top values of identifiers and free text are single rows and say nothing
+            results[col] = {
+                "unique_values": unique_count,
+                "top_values": {},
+                "top_values_detailed": [],
+                "high_cardinality": True,
+                "pruned_reason": reason
+            }
+            continue
 
         # Create top_values as a dictionary for frontend compatibility
         top_values_dict = {}
@@ -37,5 +52,8 @@ def categorical_statistics(df: pd.DataFrame, top_n: int = 8):
             "top_values_detailed": top_values_list,  # For detailed analysis
             "high_cardinality": unique_count > 20
         }
+        if action == "bucket":
+            # Rows outside the listed values, folded into one "other" count
+            results[col]["other_count"] = int(non_null - value_counts.head(top_n).sum())
 
     return results
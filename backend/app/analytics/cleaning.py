@@ -1,10 +1,118 @@
 # app/analytics/cleaning.py
 
+import numpy as np
 import pandas as pd
 
+# Hidden sidecar column holding a 64-bit hash of each cleaned row
+ROW_HASH_COLUMN = "__row_hash__"
 
-def clean_dataset(df: pd.DataFrame):
+# Bump whenever clean_dataset's output changes so persisted cleaned datasets are rebuilt
+CLEANING_VERSION = "3"
+
+# Compact mode stores a text column as category when it has at most this many
+# distinct values per row
+COMPACT_MAX_CATEGORY_RATIO = 0.5
+
+
+def normalize_column_name(col: str) -> str:
+    return col.strip().lower().replace(" ", "_")
+
+
+def _stripped_text(values: pd.Series) -> pd.Series:
+    """Values of an object column as _strip_whitespace leaves them: text stripped, other
+    objects compared as their stripped text, missing values kept missing"""
+    return values.where(values.isna(), values.astype(str).str.strip())
+
+
+def compute_row_hashes(df: pd.DataFrame):
+    """Hash every row as clean_dataset would see it, so duplicates can be found on projected
+    or chunked loads. Only the row-local whitespace step matters: typed frames have no fully
+    numeric text columns left for the numeric conversion to change."""
+    normalized = pd.DataFrame({
+        i: _stripped_text(df.iloc[:, i]) if df.iloc[:, i].dtype == "object" else df.iloc[:, i]
+        for i in range(df.shape[1])
+    }, index=df.index, copy=False)
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+
+
+def duplicate_mask(row_hashes, existing_hashes=None) -> np.ndarray:
+    """Mark rows whose hash repeats an earlier row, or any row of `existing_hashes` so an
+    appended batch can be checked against the stored dataset without rehashing it"""
+    mask = pd.Series(row_hashes).duplicated().to_numpy()
+    if existing_hashes is not None and len(existing_hashes) > 0:
+        mask |= np.isin(row_hashes, existing_hashes)
+    return mask
+
+
+def _strip_whitespace(df: pd.DataFrame, col) -> int:
+    """Strip whitespace from one object column, replacing it only if a value changes;
+    returns how many values changed"""
+    values = df[col]
+    kind = pd.api.types.infer_dtype(values, skipna=True)
+    if kind == "empty":
+        return 0
+
+    if kind != "string":
+        # Mixed Python objects (e.g. numbers and text from Excel) are compared as text
+        df[col] = values.where(values.isna(), values.astype(str))
+        values = df[col]
+
+    # Strip each distinct value once; repeated values then share the stripped string
+    # instead of each row allocating its own copy
+    codes, uniques = values.factorize()
+    stripped = uniques.str.strip().to_numpy(dtype=object)
+    changed_uniques = uniques.to_numpy(dtype=object) != stripped
+    if not changed_uniques.any():
+        return 0
+
+    present = codes >= 0
+    changed = int(changed_uniques[codes[present]].sum())
+    cleaned = np.full(len(codes), np.nan, dtype=object)
+    cleaned[present] = stripped[codes[present]]
+    df[col] = pd.Series(cleaned, index=df.index)
+
+    return changed
+
+
+def _compact_columns(df: pd.DataFrame):
+    """Store repetitive text as category and numbers in the narrowest lossless dtype, in place.
+
+    Returns (converted column names, bytes saved).
+    """
+    compacted = []
+    memory_saved = 0
+
+    for col in df.columns:
+        values = df[col]
+        if values.dtype == "object":
+            candidate = values.astype("category")
+            # Categories only pay off when values repeat
+            if len(candidate.cat.categories) > COMPACT_MAX_CATEGORY_RATIO * len(values):
+                continue
+        elif pd.api.types.is_integer_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            candidate = pd.to_numeric(values, downcast="integer")
+        elif pd.api.types.is_float_dtype(values):
+            candidate = values.astype(np.float32)
+            if not np.array_equal(candidate.to_numpy(dtype=np.float64), values.to_numpy(), equal_nan=True):
+                continue
+        else:
+            continue
+
+        if candidate.dtype == values.dtype:
+            continue
+
+        memory_saved += values.memory_usage(deep=True, index=False) - candidate.memory_usage(deep=True, index=False)
+        df[col] = candidate
+        compacted.append(col)
+
+    return compacted, memory_saved
+
+
+def clean_dataset(df: pd.DataFrame, schema: list = None, compact: bool = False):
     cleaning_actions = []
+
+    # Precomputed row hashes let a column-projected frame dedupe on the full row
+    row_hashes = df.pop(ROW_HASH_COLUMN) if ROW_HASH_COLUMN in df.columns else None
     original_shape = df.shape
     
     # Track cleaning metrics
@@ -14,21 +122,18 @@ def clean_dataset(df: pd.DataFrame):
 
     # 1️⃣ Strip column names
     original_columns = df.columns.tolist()
-    df.columns = [col.strip().lower().replace(" ", "_") for col in df.columns]
+    df.columns = [normalize_column_name(col) for col in df.columns]
 
     if original_columns != df.columns.tolist():
         cleaning_actions.append("Normalized column names")
-        columns_normalized = len([col for col in original_columns if col != col.strip().lower().replace(" ", "_")])
+        columns_normalized = len([col for col in original_columns if col != normalize_column_name(col)])
 
     # 2️⃣ Strip whitespace from string values
+    # Only values with leading/trailing whitespace are rewritten; missing values stay missing
     object_cols = df.select_dtypes(include="object").columns
     for col in object_cols:
-        original_values = df[col].copy()
-        df[col] = df[col].astype(str).str.strip()
-        # Count rows that were actually cleaned
-        if not original_values.equals(df[col]):
-            rows_cleaned += (original_values != df[col]).sum()
-            
+        rows_cleaned += _strip_whitespace(df, col)
+
     if len(object_cols) > 0:
         cleaning_actions.append("Stripped whitespace from text columns")
 
@@ -36,13 +141,18 @@ def clean_dataset(df: pd.DataFrame):
     missing_values = df.isnull().sum().to_dict()
 
     # 4️⃣ Try numeric conversion
+    # Columns the upload-time schema already classified as text are not re-tested
+    text_columns = {
+        normalize_column_name(column["name"]) for column in schema or []
+        if column["logical_type"] not in ("integer", "float")
+    }
     converted_columns = []
     for col in df.columns:
-        if df[col].dtype == "object":
+        if df[col].dtype == "object" and col not in text_columns:
             try:
-                # Try to convert to numeric
+                # Try to convert to numeric; columns with non-numeric text raise and stay as-is
                 original_dtype = df[col].dtype
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+                df[col] = pd.to_numeric(df[col])
                 if df[col].dtype != original_dtype:
                     converted_columns.append(col)
                     types_converted += 1
@@ -52,10 +162,20 @@ def clean_dataset(df: pd.DataFrame):
     if converted_columns:
         cleaning_actions.append(f"Converted columns to numeric: {converted_columns}")
 
-    # 5️⃣ Remove duplicate rows
-    initial_rows = len(df)
-    df = df.drop_duplicates()
-    duplicates_removed = initial_rows - len(df)
+    # 5️⃣ Compact memory layout (optional)
+    memory_saved = 0
+    if compact:
+        compacted, memory_saved = _compact_columns(df)
+        if compacted:
+            cleaning_actions.append(f"Compacted columns: {compacted}")
+
+    # 6️⃣ Remove duplicate rows
+    # Only build a new frame when there is something to drop, so memory-mapped
+    # columns stay shared for the common duplicate-free case
+    duplicates = duplicate_mask(row_hashes) if row_hashes is not None else df.duplicated().to_numpy()
+    duplicates_removed = int(duplicates.sum())
+    if duplicates_removed > 0:
+        df = df[~duplicates]
     
     if duplicates_removed > 0:
         cleaning_actions.append(f"Removed {duplicates_removed} duplicate rows")
@@ -70,5 +190,6 @@ def clean_dataset(df: pd.DataFrame):
         "types_converted": int(types_converted),
         "duplicates_removed": int(duplicates_removed),
         "original_shape": original_shape,
-        "final_shape": df.shape
+        "final_shape": df.shape,
+        "memory_saved_bytes": int(memory_saved)
     }
@@ -3,7 +3,16 @@
 import pandas as pd
 import numpy as np
 import math
+from multiprocessing import shared_memory
+from concurrent.futures.process import BrokenProcessPool
 from typing import Dict, Any, List, Tuple
+from app.analytics.cardinality import TOP_LEVELS, plan_column
+from app.config import ASSOCIATION_WORKERS, CORRELATION_BLOCK_BYTES, CORRELATION_BLOCK_MIN_COLUMNS
+
+# Columns the loader must materialize for each analysis in this module
+CORRELATION_COLUMNS = {"dtypes": ["number"]}
+ASSOCIATION_COLUMNS = {"dtypes": ["object", "category"]}
+MULTICOLLINEARITY_COLUMNS = {"dtypes": ["number"]}
 
 
 def safe_float(value):
@@ -13,13 +22,25 @@ def safe_float(value):
     return float(round(value, 4))
 
 
+# Pairs listed in all_correlations, strongest first
+TOP_CORRELATION_PAIRS = 100
+
+# Widest matrix also returned as a nested column -> column dict; every width gets the
+# compact columns + row-list form
+MATRIX_DICT_MAX_COLUMNS = 50
+
+# Lower bounds of the strength classes of _get_correlation_strength
+STRENGTH_BOUNDS = np.array([0.3, 0.5, 0.7, 0.9])
+STRENGTH_LABELS = np.array(["very_weak", "weak", "moderate", "strong", "very_strong"])
+
+
 def calculate_correlation_matrix(df: pd.DataFrame) -> Dict[str, Any]:
     """Calculate comprehensive correlation analysis"""
     
-    # Get numeric columns only
-    numeric_df = df.select_dtypes(include=[np.number])
+    # Get numeric columns only, by position: very wide frames cannot afford a numeric copy
+    positions = _numeric_positions(df)
     
-    if numeric_df.empty or len(numeric_df.columns) < 2:
+    if len(df) == 0 or len(positions) < 2:
         return {
             "correlation_matrix": {},
             "strong_correlations": [],
@@ -31,55 +52,257 @@ def calculate_correlation_matrix(df: pd.DataFrame) -> Dict[str, Any]:
             }
         }
     
+    if len(positions) > CORRELATION_BLOCK_MIN_COLUMNS:
+        return _blocked_correlation_analysis(df, positions)
+    
+    numeric_df = df.iloc[:, positions]
     # Calculate correlation matrix
     corr_matrix = numeric_df.corr()
+    columns = [str(col) for col in corr_matrix.columns]
+    values = corr_matrix.to_numpy()
+    
+    # Rounded like safe_float, with None for NaN and infinity, in one pass over the matrix
+    rounded = np.round(values, 4)
+    serializable = rounded.astype(object)
+    serializable[~np.isfinite(rounded)] = None
+    rows = serializable.tolist()
     
-    # Convert to serializable format
     correlation_dict = {}
-    for col1 in corr_matrix.columns:
-        correlation_dict[col1] = {}
-        for col2 in corr_matrix.columns:
-            corr_value = corr_matrix.loc[col1, col2]
-            correlation_dict[col1][col2] = safe_float(corr_value)
-    
-    # Find strong correlations (excluding self-correlations)
-    strong_correlations = []
-    correlation_pairs = []
-    
-    for i, col1 in enumerate(corr_matrix.columns):
-        for j, col2 in enumerate(corr_matrix.columns):
-            if i < j:  # Avoid duplicates and self-correlation
-                corr_value = corr_matrix.loc[col1, col2]
-                if not pd.isna(corr_value):
-                    correlation_pairs.append({
-                        'column1': col1,
-                        'column2': col2,
-                        'correlation': safe_float(corr_value),
-                        'strength': _get_correlation_strength(abs(corr_value)),
-                        'direction': 'positive' if corr_value > 0 else 'negative'
-                    })
-                    
-                    # Strong correlations (|r| > 0.7)
-                    if abs(corr_value) > 0.7:
-                        strong_correlations.append({
-                            'column1': col1,
-                            'column2': col2,
-                            'correlation': safe_float(corr_value),
-                            'strength': _get_correlation_strength(abs(corr_value)),
-                            'direction': 'positive' if corr_value > 0 else 'negative',
-                            'interpretation': _interpret_correlation(corr_value, col1, col2)
-                        })
+    if len(columns) <= MATRIX_DICT_MAX_COLUMNS:
+        correlation_dict = {col1: dict(zip(columns, row)) for col1, row in zip(columns, rows)}
+    
+    # Upper triangle (excluding self-correlations), without pairs that have no correlation
+    first, second = np.triu_indices(len(columns), k=1)
+    pair_values = values[first, second]
+    defined = ~np.isnan(pair_values)
+    first, second, pair_values = first[defined], second[defined], pair_values[defined]
+    pair_rounded = rounded[first, second]
+    abs_values = np.abs(pair_values)
+    strengths = STRENGTH_LABELS[np.digitize(abs_values, STRENGTH_BOUNDS)]
     
-    # Summary statistics
-    total_pairs = len(correlation_pairs)
-    strong_positive = len([c for c in correlation_pairs if c['correlation'] and c['correlation'] > 0.7])
-    strong_negative = len([c for c in correlation_pairs if c['correlation'] and c['correlation'] < -0.7])
-    moderate_correlations = len([c for c in correlation_pairs if c['correlation'] and 0.3 <= abs(c['correlation']) <= 0.7])
+    def _pair(k: int, interpret: bool = False) -> Dict[str, Any]:
+        return _correlation_pair(columns[first[k]], columns[second[k]], pair_values[k], strengths[k], interpret)
+    
+    # Strong correlations (|r| > 0.7)
+    strong_correlations = [_pair(k, interpret=True) for k in np.flatnonzero(abs_values > 0.7)]
+    
+    # Strongest pairs only, without sorting them all
+    top = _strongest(np.abs(pair_rounded), np.arange(len(pair_rounded)), TOP_CORRELATION_PAIRS)
+    
+    strong_positive, strong_negative, moderate_correlations = _summary_counts(pair_rounded)
+    total_pairs = len(pair_values)
     
     return {
         "correlation_matrix": correlation_dict,
+        "correlation_matrix_compact": {"columns": columns, "values": rows},
+        "strong_correlations": strong_correlations,
+        "all_correlations": [_pair(k) for k in top],
+        "correlation_summary": {
+            "total_pairs": total_pairs,
+            "strong_positive": strong_positive,
+            "strong_negative": strong_negative,
+            "moderate_correlations": moderate_correlations,
+            "weak_correlations": total_pairs - strong_positive - strong_negative - moderate_correlations
+        }
+    }
+
+
+def _strongest(keys: np.ndarray, positions: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest keys, largest first and ties by lower position; argpartition
+    finds the k-th key so only the pairs at or above it are sorted"""
+    candidates = np.arange(len(keys))
+    if len(keys) > k:
+        kth = keys[np.argpartition(-keys, k - 1)[k - 1]]
+        candidates = np.flatnonzero(keys >= kth)
+    order = np.lexsort((positions[candidates], -keys[candidates]))
+    return candidates[order[:k]]
+
+
+def _correlation_pair(col1: str, col2: str, value: float, strength: str,
+                      interpret: bool = False) -> Dict[str, Any]:
+    """One entry of strong_correlations / all_correlations"""
+    pair = {
+        'column1': col1,
+        'column2': col2,
+        'correlation': safe_float(value),
+        'strength': str(strength),
+        'direction': 'positive' if value > 0 else 'negative'
+    }
+    if interpret:
+        pair['interpretation'] = _interpret_correlation(value, col1, col2)
+    return pair
+
+
+def _summary_counts(rounded: np.ndarray) -> Tuple[int, int, int]:
+    """Strong positive, strong negative and moderate pairs among rounded correlations;
+    moderate is 0.3 <= |r| <= 0.7"""
+    classes = np.digitize(np.abs(rounded), [0.3, np.nextafter(0.7, 1.0)])
+    return (
+        int(np.count_nonzero((classes == 2) & (rounded > 0))),
+        int(np.count_nonzero((classes == 2) & (rounded < 0))),
+        int(np.count_nonzero(classes == 1))
+    )
+
+
+# Columns per side of a matrix page served by correlation_block, by default and at most
+CORRELATION_PAGE_COLUMNS = 100
+MAX_CORRELATION_PAGE_COLUMNS = 1000
+
+
+def _numeric_positions(df: pd.DataFrame) -> np.ndarray:
+    """Positions of the columns select_dtypes(include=[np.number]) keeps, found without
+    copying any rows"""
+    head = df.iloc[:0].set_axis(range(len(df.columns)), axis=1)
+    return head.select_dtypes(include=[np.number]).columns.to_numpy(dtype=np.int64)
+
+
+class _CentredColumns:
+    """Numeric columns standardized for tiled correlation. Only the column means, norms and
+    missing-value flags are kept; each tile rebuilds the panels it needs from the frame
+    (values minus their column mean with missing values as 0 and, where values are missing,
+    the presence mask for pairwise-complete sums), so no rows x columns copy is held beside
+    the frame and memory stays within the tile budget. Columns are the frame's columns at
+    `positions`, in that order"""
+    
+    def __init__(self, df: pd.DataFrame, positions: np.ndarray):
+        self.df = df
+        self.positions = positions
+        self.rows = len(df)
+        count = len(positions)
+        self.means = np.zeros(count)
+        self.norms = np.zeros(count)
+        self.has_missing = np.zeros(count, dtype=bool)
+        for i, position in enumerate(positions):
+            values = df.iloc[:, position].to_numpy(dtype=np.float64, na_value=np.nan)
+            missing = np.isnan(values)
+            present = self.rows - int(missing.sum())
+            self.has_missing[i] = present < self.rows
+            self.means[i] = values[~missing].sum() / present if present else 0.0
+            centred = np.where(missing, 0.0, values - self.means[i])
+            self.norms[i] = np.sqrt(centred @ centred)
+        # The row panel is reused across a row of tiles
+        self._row_panel = None
+    
+    def _panel(self, s: slice):
+        """(centred values, presence mask or None) of columns s, column-major so the panel
+        is contiguous for the matrix products"""
+        positions = self.positions[s]
+        if positions[-1] - positions[0] == len(positions) - 1:
+            frame = self.df.iloc[:, positions[0]:positions[-1] + 1]
+        else:
+            frame = self.df.iloc[:, positions]
+        # Always a copy: to_numpy can return a view of the frame, and the panel is centred in place
+        values = np.array(frame.to_numpy(dtype=np.float64, na_value=np.nan), dtype=np.float64, order="F")
+        present = None
+        if self.has_missing[s].any():
+            present = ~np.isnan(values)
+        values -= self.means[s]
+        if present is not None:
+            values[~present] = 0.0
+        return values, present
+    
+    def tile(self, a: slice, b: slice) -> np.ndarray:
+        """Pearson correlations of columns a (rows of the tile) with columns b, as
+        DataFrame.corr computes them: NaN for constant columns or fewer than two shared rows"""
+        key = (a.start, a.stop)
+        if self._row_panel is None or self._row_panel[0] != key:
+            self._row_panel = None  # freed before the next panel is built
+            self._row_panel = (key, self._panel(a))
+        xa, present_a = self._row_panel[1]
+        xb, present_b = (xa, present_a) if (b.start, b.stop) == key else self._panel(b)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if not (self.has_missing[a].any() or self.has_missing[b].any()):
+                tile = (xa.T @ xb) / np.outer(self.norms[a], self.norms[b])
+                tile[~np.isfinite(tile)] = np.nan
+            else:
+                ma = (np.ones_like(xa) if present_a is None else present_a).astype(np.float64)
+                mb = (np.ones_like(xb) if present_b is None else present_b).astype(np.float64)
+                counts = ma.T @ mb
+                sum_a = xa.T @ mb
+                sum_b = ma.T @ xb
+                var_a = (xa * xa).T @ mb - sum_a * sum_a / counts
+                var_b = ma.T @ (xb * xb) - sum_b * sum_b / counts
+                tile = (xa.T @ xb - sum_a * sum_b / counts) / np.sqrt(var_a * var_b)
+                tile[(counts < 2) | ~np.isfinite(tile)] = np.nan
+        return np.clip(tile, -1.0, 1.0)
+
+
+def _tile_columns(rows: int, columns: int, budget: int) -> int:
+    """Columns per tile side so the masked path's panels (the cached row panel included)
+    and tile products stay within `budget` bytes: about 6 panels of rows x b and 6 products
+    of b x b float64"""
+    b = (-rows + math.sqrt(rows * rows + budget / 12)) / 2
+    return max(8, min(columns, int(b)))
+
+
+def _blocked_correlation_analysis(df: pd.DataFrame, positions: np.ndarray) -> Dict[str, Any]:
+    """calculate_correlation_matrix for very wide frames: the matrix is computed tile by
+    tile within CORRELATION_BLOCK_BYTES and never held whole; only strong pairs, the
+    strongest TOP_CORRELATION_PAIRS and the summary counts are kept, and the matrix itself
+    is left to correlation_block pages"""
+    columns = [str(df.columns[position]) for position in positions]
+    count = len(columns)
+    centred = _CentredColumns(df, positions)
+    size = _tile_columns(centred.rows, count, CORRELATION_BLOCK_BYTES)
+    
+    strong = []
+    top = (np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0), np.empty(0))
+    total_pairs = strong_positive = strong_negative = moderate_correlations = 0
+    
+    for row_start in range(0, count, size):
+        a = slice(row_start, min(row_start + size, count))
+        for col_start in range(row_start, count, size):
+            b = slice(col_start, min(col_start + size, count))
+            tile = centred.tile(a, b)
+            
+            first, second = np.nonzero(np.isfinite(tile))
+            first, second = first + row_start, second + col_start
+            upper = first < second  # diagonal tiles: strict upper triangle only
+            first, second = first[upper], second[upper]
+            values = tile[first - row_start, second - col_start]
+            del tile
+            
+            rounded = np.round(values, 4)
+            positive, negative, moderate = _summary_counts(rounded)
+            total_pairs += len(values)
+            strong_positive += positive
+            strong_negative += negative
+            moderate_correlations += moderate
+            
+            # Strong pairs stream out of each tile (|r| > 0.7)
+            is_strong = np.abs(values) > 0.7
+            strong.append((first[is_strong], second[is_strong], values[is_strong]))
+            
+            # Running top-k over the tiles seen so far
+            first = np.concatenate([top[0], first])
+            second = np.concatenate([top[1], second])
+            values = np.concatenate([top[2], values])
+            rounded = np.concatenate([top[3], rounded])
+            keep = _strongest(np.abs(rounded), first * count + second, TOP_CORRELATION_PAIRS)
+            top = (first[keep], second[keep], values[keep], rounded[keep])
+    
+    def _pairs(first, second, values, order, interpret=False):
+        strengths = STRENGTH_LABELS[np.digitize(np.abs(values), STRENGTH_BOUNDS)]
+        return [
+            _correlation_pair(columns[first[k]], columns[second[k]], values[k], strengths[k], interpret)
+            for k in order
+        ]
+    
+    # Same order as the dense path: strong pairs by position, top pairs by |r| then position
+    first, second, values = (np.concatenate(part) for part in zip(*strong))
+    strong_correlations = _pairs(first, second, values, np.lexsort((second, first)), interpret=True)
+    # Already in order from _strongest
+    all_correlations = _pairs(*top[:3], range(len(top[2])))
+    
+    return {
+        "correlation_matrix": {},
+        "correlation_blocks": {
+            "columns": columns,
+            "block_columns": CORRELATION_PAGE_COLUMNS,
+            "blocks_per_side": math.ceil(count / CORRELATION_PAGE_COLUMNS)
+        },
         "strong_correlations": strong_correlations,
-        "all_correlations": sorted(correlation_pairs, key=lambda x: abs(x['correlation'] or 0), reverse=True),
+        "all_correlations": all_correlations,
         "correlation_summary": {
             "total_pairs": total_pairs,
             "strong_positive": strong_positive,
@@ -90,6 +313,41 @@ def calculate_correlation_matrix(df: pd.DataFrame) -> Dict[str, Any]:
     }
 
 
+def correlation_block(df: pd.DataFrame, row_block: int, col_block: int,
+                      block_columns: int = CORRELATION_PAGE_COLUMNS) -> Dict[str, Any]:
+    """One page of the numeric correlation matrix: the correlations of the row_block-th run
+    of block_columns numeric columns with the col_block-th run, computed from those
+    columns alone"""
+    numeric_positions = _numeric_positions(df)
+    row_positions = numeric_positions[row_block * block_columns:(row_block + 1) * block_columns]
+    col_positions = numeric_positions[col_block * block_columns:(col_block + 1) * block_columns]
+    if len(row_positions) == 0 or len(col_positions) == 0:
+        raise ValueError(f"Block ({row_block}, {col_block}) is outside the {len(numeric_positions)}-column matrix")
+    
+    # Standardize only the two runs; aligned runs are either the same or disjoint
+    if row_block == col_block:
+        centred = _CentredColumns(df, row_positions)
+        rows = cols = slice(0, len(row_positions))
+    else:
+        centred = _CentredColumns(df, np.concatenate([row_positions, col_positions]))
+        rows = slice(0, len(row_positions))
+        cols = slice(len(row_positions), len(row_positions) + len(col_positions))
+    tile = centred.tile(rows, cols)
+    
+    rounded = np.round(tile, 4)
+    values = rounded.astype(object)
+    values[~np.isfinite(rounded)] = None
+    return {
+        "row_block": row_block,
+        "col_block": col_block,
+        "block_columns": block_columns,
+        "blocks_per_side": math.ceil(len(numeric_positions) / block_columns),
+        "row_columns": [str(df.columns[position]) for position in row_positions],
+        "col_columns": [str(df.columns[position]) for position in col_positions],
+        "values": values.tolist()
+    }
+
+
 def _get_correlation_strength(abs_corr: float) -> str:
     """Classify correlation strength"""
     if abs_corr >= 0.9:
@@ -125,64 +383,222 @@ def calculate_categorical_associations(df: pd.DataFrame) -> Dict[str, Any]:
     
     categorical_cols = df.select_dtypes(include=['object', 'category']).columns
     
+    # Identifier-like and free-text columns are left out and the long tail of other
+    # high-cardinality columns is folded into one "other" level, so each contingency
+    # table stays within (TOP_LEVELS + 1)^2 cells whatever was uploaded
+    factorized = []
+    kept_cols = []
+    pruned_columns = []
+    bucketed_columns = []
+    for col in categorical_cols:
+        codes, levels = _factorize_codes(df[col])
+        counts = np.bincount(codes[codes >= 0], minlength=levels)
+        non_null = int(counts.sum())
+        top_counts = -np.sort(-counts)[:TOP_LEVELS]
+        top_share = top_counts.sum() / non_null if non_null > 0 else 1.0
+        
+        action, reason = plan_column(levels, non_null, top_share)
+        if action == "prune":
+            pruned_columns.append({'column': col, 'unique_values': levels, 'reason': reason})
+            continue
+        if action == "bucket":
+            codes, levels = _fold_codes(codes, counts, TOP_LEVELS)
+            bucketed_columns.append({
+                'column': col,
+                'unique_values': len(counts),
+                'levels_kept': TOP_LEVELS,
+                'other_percentage': safe_float((1 - top_share) * 100)
+            })
+        factorized.append((codes, levels))
+        kept_cols.append(col)
+    categorical_cols = kept_cols
+    
     if len(categorical_cols) < 2:
         return {
             "categorical_associations": {},
-            "strong_associations": []
+            "strong_associations": [],
+            "pruned_columns": pruned_columns,
+            "bucketed_columns": bucketed_columns
         }
     
-    associations = {}
+    pair_values = _pairwise_cramers_v(factorized)
+    
+    associations = {col: {} for col in categorical_cols}
     strong_associations = []
     
     for i, col1 in enumerate(categorical_cols):
-        associations[col1] = {}
-        for j, col2 in enumerate(categorical_cols):
-            if i <= j:  # Include self and avoid duplicates
-                if i == j:
-                    associations[col1][col2] = 1.0  # Perfect association with self
-                else:
-                    cramers_v = _calculate_cramers_v(df[col1], df[col2])
-                    associations[col1][col2] = safe_float(cramers_v)
-                    associations[col2] = associations.get(col2, {})
-                    associations[col2][col1] = safe_float(cramers_v)
-                    
-                    # Strong associations (Cramér's V > 0.5)
-                    if cramers_v and cramers_v > 0.5:
-                        strong_associations.append({
-                            'column1': col1,
-                            'column2': col2,
-                            'cramers_v': safe_float(cramers_v),
-                            'strength': _get_association_strength(cramers_v),
-                            'interpretation': f"{col1} and {col2} show {_get_association_strength(cramers_v)} association"
-                        })
+        associations[col1][col1] = 1.0  # Perfect association with self
+        for j in range(i + 1, len(categorical_cols)):
+            col2 = categorical_cols[j]
+            cramers_v = pair_values[(i, j)]
+            associations[col1][col2] = safe_float(cramers_v)
+            associations[col2][col1] = safe_float(cramers_v)
+            
+            # Strong associations (Cramér's V > 0.5)
+            if cramers_v and cramers_v > 0.5:
+                strong_associations.append({
+                    'column1': col1,
+                    'column2': col2,
+                    'cramers_v': safe_float(cramers_v),
+                    'strength': _get_association_strength(cramers_v),
+                    'interpretation': f"{col1} and {col2} show {_get_association_strength(cramers_v)} association"
+                })
     
     return {
         "categorical_associations": associations,
-        "strong_associations": strong_associations
+        "strong_associations": strong_associations,
+        "pruned_columns": pruned_columns,
+        "bucketed_columns": bucketed_columns
     }
 
 
-def _calculate_cramers_v(x: pd.Series, y: pd.Series) -> float:
-    """Calculate Cramér's V statistic for categorical association"""
+# Pairs x rows below which associations are computed serially rather than on the pool
+PARALLEL_MIN_CELLS = 20_000_000
+
+# Largest contingency table built densely with np.bincount; bigger ones (high-cardinality
+# pairs) count only the cells that occur
+DENSE_TABLE_CELLS = 1 << 22
+
+
+def _factorize_codes(series: pd.Series) -> Tuple[np.ndarray, int]:
+    """Integer codes of a column (-1 for missing) and the number of distinct values"""
+    codes, uniques = pd.factorize(series)
+    return codes.astype(np.int64, copy=False), len(uniques)
+
+
+def _fold_codes(codes: np.ndarray, counts: np.ndarray, keep: int) -> Tuple[np.ndarray, int]:
+    """Renumber codes so the `keep` most frequent levels come first and all others share
+    one "other" level; missing values stay -1"""
+    top = np.argsort(-counts, kind="stable")[:keep]
+    lookup = np.full(len(counts) + 1, keep, dtype=np.int64)
+    lookup[top] = np.arange(len(top))
+    lookup[-1] = -1  # code -1 indexes the last slot
+    return lookup[codes], len(top) + 1
+
+
+def _pairwise_cramers_v(factorized: List[Tuple[np.ndarray, int]]) -> Dict[Tuple[int, int], float]:
+    """Cramér's V of every column pair (i < j), on worker processes when there is enough work"""
+    pairs = [(i, j) for i in range(len(factorized)) for j in range(i + 1, len(factorized))]
+    rows = len(factorized[0][0]) if factorized else 0
+    
+    if ASSOCIATION_WORKERS > 1 and len(pairs) * rows >= PARALLEL_MIN_CELLS:
+        try:
+            return _parallel_cramers_v(factorized, pairs)
+        except Exception as e:
+            print(f"Parallel associations failed, computing serially: {e}")
+    
+    return {(i, j): _calculate_cramers_v(*factorized[i], *factorized[j]) for i, j in pairs}
+
+
+def _association_tiles(columns: int, workers: int) -> List[List[Tuple[int, int]]]:
+    """Upper-triangle pairs split into square tiles of column blocks, several per worker"""
+    block = max(1, math.ceil(columns / (2 * workers)))
+    starts = range(0, columns, block)
+    tiles = []
+    for row_start in starts:
+        for col_start in starts:
+            if col_start < row_start:
+                continue
+            tile = [
+                (i, j)
+                for i in range(row_start, min(row_start + block, columns))
+                for j in range(max(col_start, i + 1), min(col_start + block, columns))
+            ]
+            if tile:
+                tiles.append(tile)
+    return tiles
+
+
+def _parallel_cramers_v(factorized: List[Tuple[np.ndarray, int]],
+                        pairs: List[Tuple[int, int]]) -> Dict[Tuple[int, int], float]:
+    """Run the pairs on the process pool, tile by tile, over codes in shared memory"""
+    from app.core.concurrency import discard_process_pool, get_process_pool
+    
+    levels = [level_count for _, level_count in factorized]
+    shape = (len(factorized), len(factorized[0][0]))
+    # int32 codes halve the shared block; workers widen the columns they use back to int64
+    block = shared_memory.SharedMemory(create=True, size=max(1, shape[0] * shape[1] * 4))
     try:
-        # Create contingency table
-        contingency_table = pd.crosstab(x, y)
+        codes = np.ndarray(shape, dtype=np.int32, buffer=block.buf)
+        for i, (column_codes, _) in enumerate(factorized):
+            codes[i] = column_codes
+        del codes
         
-        # Calculate chi-square statistic
-        chi2 = 0
-        n = contingency_table.sum().sum()
+        pool = get_process_pool()
+        try:
+            futures = [
+                pool.submit(_association_tile, block.name, shape, levels, tile)
+                for tile in _association_tiles(shape[0], ASSOCIATION_WORKERS)
+            ]
+            results = {}
+            for future in futures:
+                results.update(future.result())
+            return results
+        except BrokenProcessPool:
+            # A broken pool rejects every later submit; the next call starts a fresh one
+            discard_process_pool(pool)
+            raise
+    finally:
+        block.close()
+        block.unlink()
+
+
+def _association_tile(block_name: str, shape: Tuple[int, int], levels: List[int],
+                      tile: List[Tuple[int, int]]) -> Dict[Tuple[int, int], float]:
+    """Worker side: Cramér's V of one tile of pairs, read from the shared code block"""
+    block = shared_memory.SharedMemory(name=block_name)
+    try:
+        codes = np.ndarray(shape, dtype=np.int32, buffer=block.buf)
+        columns = {}
+        for i, j in tile:
+            for col in (i, j):
+                if col not in columns:
+                    columns[col] = codes[col].astype(np.int64)
+        del codes
+        return {
+            (i, j): _calculate_cramers_v(columns[i], levels[i], columns[j], levels[j])
+            for i, j in tile
+        }
+    finally:
+        block.close()
+
+
+def _calculate_cramers_v(x_codes: np.ndarray, x_levels: int,
+                         y_codes: np.ndarray, y_levels: int) -> float:
+    """Calculate Cramér's V statistic for categorical association from factorized codes"""
+    try:
+        # Rows missing either value are left out, as in pd.crosstab
+        valid = (x_codes >= 0) & (y_codes >= 0)
+        if not valid.all():
+            x_codes, y_codes = x_codes[valid], y_codes[valid]
+        cells = x_codes * y_levels + y_codes
+        n = len(cells)
+        if n == 0:
+            return 0.0
         
-        for i in range(len(contingency_table.index)):
-            for j in range(len(contingency_table.columns)):
-                observed = contingency_table.iloc[i, j]
-                expected = (contingency_table.iloc[i, :].sum() * contingency_table.iloc[:, j].sum()) / n
-                if expected > 0:
-                    chi2 += ((observed - expected) ** 2) / expected
+        if x_levels * y_levels <= DENSE_TABLE_CELLS:
+            observed = np.bincount(cells, minlength=x_levels * y_levels).reshape(x_levels, y_levels)
+            # Values that only co-occur with missing values leave empty rows and columns
+            observed = observed[observed.sum(axis=1) > 0][:, observed.sum(axis=0) > 0]
+            row_totals = observed.sum(axis=1)
+            col_totals = observed.sum(axis=0)
+            
+            expected = np.outer(row_totals, col_totals) / n
+            chi2 = float((((observed - expected) ** 2) / expected).sum())
+        else:
+            # sum((O - E)^2 / E) = n * sum(O^2 / (r * c)) - n, where only occupied cells add
+            cells, observed = np.unique(cells, return_counts=True)
+            row_totals = np.bincount(x_codes, minlength=x_levels)
+            col_totals = np.bincount(y_codes, minlength=y_levels)
+            products = row_totals[cells // y_levels].astype(np.float64) * col_totals[cells % y_levels]
+            chi2 = float(n * (observed.astype(np.float64) ** 2 / products).sum() - n)
+            row_totals = row_totals[row_totals > 0]
+            col_totals = col_totals[col_totals > 0]
         
         # Calculate Cramér's V
-        min_dim = min(len(contingency_table.index) - 1, len(contingency_table.columns) - 1)
-        if min_dim > 0 and n > 0:
-            cramers_v = math.sqrt(chi2 / (n * min_dim))
+        min_dim = min(len(row_totals) - 1, len(col_totals) - 1)
+        if min_dim > 0:
+            cramers_v = math.sqrt(max(chi2, 0.0) / (n * min_dim))
             return min(cramers_v, 1.0)  # Cap at 1.0
         
         return 0.0
@@ -0,0 +1,68 @@
+# app/analytics/frame_cache.py
+
+import threading
+from collections import OrderedDict
+import pandas as pd
+from app.config import FRAME_CACHE_MAX_BYTES
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # (dataset_id, version, projection) -> (cleaned_df, cleaning_summary, nbytes)
+_total_bytes = 0
+
+
+def dataset_version(dataset: dict) -> str:
+    """Identifier that changes whenever a dataset's content changes"""
+    return dataset.get("content_hash") or dataset.get("file_url") or dataset.get("file_path") or ""
+
+
+def _projection_key(columns):
+    if columns is None:
+        return None
+    return (tuple(sorted(columns.get("columns", []))), tuple(sorted(columns.get("dtypes", []))))
+
+
+def get_cleaned_frame(dataset_id: str, version: str, columns: dict = None):
+    """Return (cleaned_df, cleaning_summary) on a hit, preferring the full frame over a projection"""
+    keys = [(dataset_id, version, None)]
+    if columns is not None:
+        keys.append((dataset_id, version, _projection_key(columns)))
+
+    with _lock:
+        for key in keys:
+            entry = _entries.get(key)
+            if entry is not None:
+                _entries.move_to_end(key)
+                return entry[0], entry[1]
+
+    return None
+
+
+def put_cleaned_frame(dataset_id: str, version: str, columns: dict, cleaned_df: pd.DataFrame, cleaning_summary: dict):
+    """Cache a cleaned frame, evicting least recently used entries beyond the memory budget"""
+    global _total_bytes
+
+    nbytes = int(cleaned_df.memory_usage(deep=True).sum())
+    if nbytes > FRAME_CACHE_MAX_BYTES:
+        return
+
+    key = (dataset_id, version, _projection_key(columns))
+    with _lock:
+        # Entries for older versions of this dataset can never be hit again
+        for stale in [k for k in _entries if (k[0] == dataset_id and k[1] != version) or k == key]:
+            _total_bytes -= _entries.pop(stale)[2]
+
+        _entries[key] = (cleaned_df, cleaning_summary, nbytes)
+        _total_bytes += nbytes
+
+        while _total_bytes > FRAME_CACHE_MAX_BYTES and _entries:
+            _, evicted = _entries.popitem(last=False)
+            _total_bytes -= evicted[2]
+
+
+def invalidate(dataset_id: str):
+    """Drop every cached frame for a dataset"""
+    global _total_bytes
+
+    with _lock:
+        for key in [k for k in _entries if k[0] == dataset_id]:
+            _total_bytes -= _entries.pop(key)[2]
@@ -1,5 +1,6 @@
 import pandas as pd
 import math
+from app.analytics.column_stats import ColumnStats
 
 
 def safe_float(value):
@@ -16,16 +17,21 @@ def safe_int(value):
     return int(value)
 
 
-def dataset_health_score(df: pd.DataFrame):
+def dataset_health_score(df: pd.DataFrame, duplicates: int = None, column_stats: ColumnStats = None):
+    """Score a cleaned frame; `duplicates` is the row count cleaning removed, so the
+    deduplicated frame does not have to be hashed again"""
     issues = []
     score = 100
 
-    total_cells = df.shape[0] * df.shape[1]
-    total_missing = df.isnull().sum().sum()
+    column_stats = column_stats if column_stats is not None else ColumnStats(df)
+    total_cells = column_stats.row_count * column_stats.column_count
+    total_missing = column_stats.total_missing
     missing_percentage = safe_float((total_missing / total_cells) * 100) if total_cells > 0 else 0
 
     # Count duplicate rows
-    duplicates = df.duplicated().sum()
+    if duplicates is None:
+        duplicates = df.duplicated().sum()
+    source_rows = len(df) + duplicates
 
     # 🔻 Missing data penalty
     if missing_percentage > 20:
@@ -37,7 +43,7 @@ def dataset_health_score(df: pd.DataFrame):
 
     # 🔄 Duplicate data penalty
     if duplicates > 0:
-        duplicate_pct = safe_float((duplicates / len(df)) * 100) if len(df) > 0 else 0
+        duplicate_pct = safe_float((duplicates / source_rows) * 100) if source_rows > 0 else 0
         if duplicate_pct > 10:
             score -= 15
             issues.append(f"High duplicate rate: {duplicate_pct}%")
@@ -46,8 +52,8 @@ def dataset_health_score(df: pd.DataFrame):
             issues.append(f"Moderate duplicate rate: {duplicate_pct}%")
 
     # 🔢 Column type balance
-    numeric_cols = df.select_dtypes(include="number").columns
-    categorical_cols = df.select_dtypes(include=["object", "category"]).columns
+    numeric_cols = column_stats.numeric_columns
+    categorical_cols = column_stats.categorical_columns
 
     total_cols = len(df.columns)
     numeric_pct = safe_float((len(numeric_cols) / total_cols) * 100) if total_cols > 0 else 0
@@ -56,7 +62,7 @@ def dataset_health_score(df: pd.DataFrame):
     # ⚠️ Cardinality risk
     high_cardinality_cols = []
     for col in categorical_cols:
-        if df[col].nunique(dropna=True) > 50:  # Increased threshold for large datasets
+        if column_stats.unique[col] > 50:  # Increased threshold for large datasets
             high_cardinality_cols.append(col)
 
     if high_cardinality_cols:
@@ -66,7 +72,7 @@ def dataset_health_score(df: pd.DataFrame):
     # 🕳️ Near-empty columns
     near_empty = []
     for col in df.columns:
-        col_missing_pct = safe_float((df[col].isnull().sum() / len(df)) * 100) if len(df) > 0 else 0
+        col_missing_pct = safe_float((column_stats.missing[col] / len(df)) * 100) if len(df) > 0 else 0
         if col_missing_pct > 90:
             near_empty.append(col)
 
@@ -1,22 +1,254 @@
+import json
+import os
 import pandas as pd
 from fastapi import HTTPException
-import requests
-import io
+from fastapi.concurrency import run_in_threadpool
+from app.config import COMPACT_FRAMES, DATASET_LOAD_MODE, SKETCH_ANALYTICS_MIN_ROWS
+from app.core.concurrency import run_analytics
+from app.datasets.schema import frame_schema, schema_dtypes, schema_fields
+from app.datasets.storage import open_dataset_file, open_dataset_file_async
+from app.analytics.cleaning import CLEANING_VERSION, ROW_HASH_COLUMN, clean_dataset, normalize_column_name
+from app.analytics.serialization import safe_serialize
+from app.analytics.frame_cache import dataset_version, get_cleaned_frame, put_cleaned_frame
+from app.datasets.columnar import (
+    SIDECAR_FORMAT,
+    cleaned_path,
+    has_sidecar,
+    read_file_metadata,
+    read_raw_dataset,
+    read_sidecar,
+    read_sketch,
+    row_index,
+    sidecar_schema,
+    stage_cleaned_append,
+    write_cleaned,
+    write_sidecar
+)
 
-def load_dataset(dataset_id: str, user_email: str, db):
-    """Load dataset from Cloudinary URL"""
-    datasets_collection = db.datasets
-    
-    # Fetch dataset metadata
-    dataset = datasets_collection.find_one({
+
+def merge_column_requirements(*requirements):
+    """Combine the column requirements of several analytics components (None means every column)"""
+    if any(req is None for req in requirements):
+        return None
+
+    return {
+        "columns": sorted({col for req in requirements for col in req.get("columns", [])}),
+        "dtypes": sorted({dtype for req in requirements for dtype in req.get("dtypes", [])})
+    }
+
+
+def select_columns(fields: list, requirements: dict):
+    """Resolve requirements against (raw name, dtype class) pairs; None means load every column"""
+    if requirements is None:
+        return None
+
+    wanted_names = set(requirements.get("columns", []))
+    wanted_dtypes = set(requirements.get("dtypes", []))
+
+    # Without dtype information a dtype requirement cannot be resolved safely
+    if wanted_dtypes and any(dtype_class is None for _, dtype_class in fields):
+        return None
+
+    return [
+        name for name, dtype_class in fields
+        if name != ROW_HASH_COLUMN
+        and (normalize_column_name(name) in wanted_names or dtype_class in wanted_dtypes)
+    ]
+
+
+def get_dataset_document(dataset_id: str, user_email: str, db) -> dict:
+    """Fetch a dataset's metadata document, raising 404 if the user does not own it"""
+    dataset = db.datasets.find_one({
         "dataset_id": dataset_id,
         "user_email": user_email
     })
-    
+
     if not dataset:
         raise HTTPException(status_code=404, detail="Dataset not found")
 
-    # Get file URL (Cloudinary) or fallback to local path
+    return dataset
+
+
+def load_dataset(dataset_id: str, user_email: str, db, columns: dict = None):
+    """Load dataset from its columnar sidecar, falling back to the raw stored file
+
+    `columns` is a requirements dict ({"columns": [...], "dtypes": [...]}) using cleaned
+    column names and select_dtypes classes; only matching columns are materialized.
+    """
+    dataset = get_dataset_document(dataset_id, user_email, db)
+    return read_dataset(dataset, db, columns=columns)
+
+
+async def load_cleaned_dataset_async(dataset_id: str, user_email: str, db, columns: dict = None):
+    """Cleaned frame, cleaning summary and metadata for async routes, served from the
+    per-process frame cache when warm"""
+    dataset = await run_in_threadpool(get_dataset_document, dataset_id, user_email, db)
+    version = dataset_version(dataset)
+
+    cached = get_cleaned_frame(dataset_id, version, columns)
+    if cached is not None:
+        cleaned_df, cleaning_summary = cached
+        return cleaned_df, cleaning_summary, dataset_metadata(dataset)
+
+    # Download over the pooled async client; parse and clean in the analytics executor
+    source = None
+    if not has_sidecar(dataset) and (dataset.get("file_url") or dataset.get("file_path")):
+        try:
+            source = await open_dataset_file_async(dataset)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Unable to read dataset: {str(e)}")
+
+    return await run_analytics(_load_and_clean, dataset, db, version, columns, source)
+
+
+async def load_dataset_sketch_async(dataset_id: str, user_email: str, db):
+    """(sketch, metadata) for datasets large enough to be summarized from their upload-time
+    column sketches, or None when the frame should be loaded instead"""
+    if not SKETCH_ANALYTICS_MIN_ROWS:
+        return None
+
+    dataset = await run_in_threadpool(get_dataset_document, dataset_id, user_email, db)
+    if (dataset.get("row_count") or 0) < SKETCH_ANALYTICS_MIN_ROWS:
+        return None
+
+    # A sketch left behind by an interrupted append does not cover every row
+    sketch = await run_in_threadpool(read_sketch, dataset_id)
+    if sketch is None or sketch.rows != dataset.get("row_count"):
+        return None
+
+    return sketch, dataset_metadata(dataset)
+
+
+def _load_and_clean(dataset: dict, db, version: str, columns: dict, source):
+    dataset_id = dataset.get("dataset_id")
+
+    cleaned = read_cleaned_dataset(dataset, version, columns)
+    if cleaned is not None:
+        cleaned_df, cleaning_summary = cleaned
+    else:
+        # Clean the whole dataset once and persist it for every later load
+        df, _ = read_dataset(dataset, db, source=source)
+        if _behind_document(dataset, len(df)):
+            # An append has updated the document but not yet swapped in its sidecar; a copy
+            # cleaned now would be stored, and cached, under the new version
+            raise HTTPException(status_code=409, detail="Dataset is being updated, try again")
+        cleaned_df, cleaning_summary = clean_dataset(df, schema=dataset.get("schema"), compact=COMPACT_FRAMES)
+        write_cleaned(dataset_id, cleaned_df, {
+            "cleaning_version": CLEANING_VERSION,
+            "source_version": version,
+            "compact": str(COMPACT_FRAMES),
+            "cleaning_summary": json.dumps(safe_serialize(cleaning_summary))
+        })
+        columns = None
+
+    put_cleaned_frame(dataset_id, version, columns, cleaned_df, cleaning_summary)
+    return cleaned_df, cleaning_summary, dataset_metadata(dataset)
+
+
+def _behind_document(dataset: dict, rows: int) -> bool:
+    """Whether data holding `rows` rows predates the version the dataset document records;
+    only datasets with a sidecar can be appended to, and their row_count is exact"""
+    return has_sidecar(dataset) and dataset.get("row_count") is not None and rows != dataset["row_count"]
+
+
+def stage_cleaned_extension(dataset: dict, rows: pd.DataFrame, duplicates, version: str):
+    """Staged copy of a dataset's persisted cleaned copy brought up to `version` by cleaning
+    only the appended `rows` (typed like the sidecar; `duplicates` marks rows the dataset
+    already holds). Returns its temporary path, to be moved over cleaned_path once the
+    append is committed, or None when there is no cleaned copy or it cannot be extended;
+    the cleaned copy is then dropped and rebuilt on the next load."""
+    dataset_id = dataset.get("dataset_id", "")
+    path = cleaned_path(dataset_id)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        stored = read_file_metadata(path)
+        # Compact frames pick their categories from the whole dataset, so they are rebuilt
+        if (
+            stored.get("cleaning_version") != CLEANING_VERSION
+            or stored.get("source_version") != dataset_version(dataset)
+            or stored.get("compact") != str(False)
+            or COMPACT_FRAMES
+        ):
+            raise ValueError("cleaned copy cannot be extended")
+
+        # Row labels continue the source row positions, as in a full clean
+        first_row = dataset.get("row_count") or 0
+        rows = rows.set_axis(pd.RangeIndex(first_row, first_row + len(rows)))
+        cleaned_rows, summary = clean_dataset(rows[~duplicates], schema=dataset.get("schema"))
+
+        previous = json.loads(stored["cleaning_summary"])
+        removed = int(duplicates.sum()) + summary["duplicates_removed"]
+        total_removed = previous["duplicates_removed"] + removed
+        missing = {normalize_column_name(col): int(count) for col, count in rows.isnull().sum().items()}
+        actions = [
+            action for action in previous["cleaning_actions"] + summary["cleaning_actions"]
+            if not action.startswith("Removed ")
+        ]
+        if total_removed > 0:
+            actions.append(f"Removed {total_removed} duplicate rows")
+
+        summary = {
+            **previous,
+            "missing_values": {
+                col: previous["missing_values"].get(col, 0) + missing.get(col, 0)
+                for col in previous["missing_values"]
+            },
+            "cleaning_actions": list(dict.fromkeys(actions)),
+            "rows_cleaned": previous["rows_cleaned"] + summary["rows_cleaned"] - summary["duplicates_removed"] + removed,
+            "duplicates_removed": total_removed,
+            "original_shape": [previous["original_shape"][0] + len(rows), previous["original_shape"][1]],
+            "final_shape": [previous["final_shape"][0] + len(cleaned_rows), previous["final_shape"][1]]
+        }
+
+        return stage_cleaned_append(path, cleaned_rows, {
+            "source_version": version,
+            "cleaning_summary": json.dumps(safe_serialize(summary))
+        })
+    except Exception as e:
+        print(f"Cleaned dataset dropped for {dataset_id}: {e}")
+        return None
+
+
+def read_cleaned_dataset(dataset: dict, version: str, columns: dict = None):
+    """(cleaned_df, cleaning_summary) from the persisted cleaned dataset, or None when it is
+    missing or was built from other data, another cleaning version or another compact mode.
+    A copy cleaned from fewer rows than the document records is not trusted either, even if
+    it carries the current version"""
+    path = cleaned_path(dataset.get("dataset_id", ""))
+    if not os.path.exists(path):
+        return None
+
+    try:
+        stored = read_file_metadata(path)
+        if (
+            stored.get("cleaning_version") != CLEANING_VERSION
+            or stored.get("source_version") != version
+            or stored.get("compact") != str(COMPACT_FRAMES)
+        ):
+            return None
+
+        cleaning_summary = json.loads(stored["cleaning_summary"])
+        if _behind_document(dataset, cleaning_summary["original_shape"][0]):
+            return None
+
+        # Cleaned column names are already normalized, so they match requirements directly
+        projection = select_columns(sidecar_schema(path), columns) if columns is not None else None
+        cleaned_df = read_sidecar(path, memory_map=DATASET_LOAD_MODE == "mmap", columns=projection)
+        return cleaned_df, cleaning_summary
+    except Exception as e:
+        print(f"Cleaned dataset read skipped for {dataset.get('dataset_id')}: {e}")
+        return None
+
+
+def read_dataset(dataset: dict, db, columns: dict = None, source=None):
+    """Materialize a dataset from its metadata document; `source` skips the file fetch"""
+    datasets_collection = db.datasets
+    dataset_id = dataset.get("dataset_id")
+    user_email = dataset.get("user_email")
+
+    # Get file URL (Cloudinary) or local path
     file_url = dataset.get("file_url") or dataset.get("file_path")
 
     if not file_url:
@@ -26,48 +258,77 @@ def load_dataset(dataset_id: str, user_email: str, db):
     try:
         filename = dataset.get("filename", "")
 
-        # Check if it's a URL or local path
-        if file_url.startswith("http"):
-            response = requests.get(file_url, timeout=30)
-            response.raise_for_status()
-            file_content = io.BytesIO(response.content)
-        else:
-            file_content = open(file_url, "rb")
+        if not filename.endswith((".csv", ".xlsx", ".xls")):
+            raise HTTPException(status_code=400, detail="Unsupported file format")
 
-        if filename.endswith(".csv"):
-            df = pd.read_csv(file_content)
-        elif filename.endswith((".xlsx", ".xls")):
-            df = pd.read_excel(file_content)
+        if has_sidecar(dataset):
+            path = dataset["sidecar_path"]
+            projection = None
+            if columns is not None:
+                fields = sidecar_schema(path)
+                projection = select_columns(fields, columns)
+                # Keep full-row duplicate detection exact on a projected frame
+                if projection is not None and any(name == ROW_HASH_COLUMN for name, _ in fields):
+                    projection.append(ROW_HASH_COLUMN)
+                elif dataset.get("duplicate_rows") != 0:
+                    projection = None
+
+            # Typed columnar copy written at upload time: no text parsing or coercion
+            df = read_sidecar(path, memory_map=DATASET_LOAD_MODE == "mmap", columns=projection)
         else:
-            raise HTTPException(status_code=400, detail="Unsupported file format")
+            schema = dataset.get("schema")
+            usecols = None
+            if columns is not None and dataset.get("duplicate_rows") == 0 and dataset.get("columns"):
+                fields = schema_fields(schema) if schema else [(name, None) for name in dataset["columns"]]
+                usecols = select_columns(fields, columns)
+
+            # Local path, cached blob, or freshly downloaded buffer; the stored schema
+            # types columns directly instead of test-converting every text column
+            file_content = source if source is not None else open_dataset_file(dataset)
+            df = read_raw_dataset(
+                file_content,
+                filename,
+                usecols=usecols,
+                memory_map=DATASET_LOAD_MODE == "mmap",
+                dtypes=schema_dtypes(schema) if schema else None
+            )
+
+            print("\n=== DATAFRAME INFO ===")
+            print(df.dtypes)
+            print("======================\n")
 
-        # Safe automatic numeric conversion
-        for col in df.columns:
-            try:
-                if df[col].dtype == "object":
-                    converted = pd.to_numeric(df[col], errors="coerce")
-                    non_null_ratio = converted.notna().sum() / max(len(converted), 1)
-                    if non_null_ratio > 0.7:
-                        df[col] = converted
-            except Exception:
-                pass
-
-        print("\n=== DATAFRAME INFO ===")
-        print(df.dtypes)
-        print("======================\n")
+            # Backfill the sidecar for datasets uploaded before it existed
+            if usecols is None:
+                row_hashes, duplicate_rows = row_index(df)
+                path = write_sidecar(dataset_id, df, row_hashes)
+                backfill = {"schema": schema or frame_schema(df)}
+                if path:
+                    backfill.update({
+                        "sidecar_path": path,
+                        "sidecar_format": SIDECAR_FORMAT,
+                        "duplicate_rows": duplicate_rows
+                    })
+                datasets_collection.update_one(
+                    {"dataset_id": dataset_id, "user_email": user_email},
+                    {"$set": backfill}
+                )
 
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Unable to read dataset: {str(e)}")
 
-    metadata = {
+    return df, dataset_metadata(dataset)
+
+
+def dataset_metadata(dataset: dict) -> dict:
+    return {
         "dataset_id": dataset.get("dataset_id"),
         "user_email": dataset.get("user_email"),
         "filename": dataset.get("filename"),
         "columns": dataset.get("columns"),
         "row_count": dataset.get("row_count"),
+        "duplicate_rows": dataset.get("duplicate_rows"),
         "column_count": dataset.get("column_count"),
         "uploaded_at": dataset.get("uploaded_at")
-    }
-    return df, metadata
\ No newline at end of file
+    }
\ No newline at end of file
@@ -4,6 +4,10 @@ import pandas as pd
 import numpy as np
 import math
 from typing import Dict, Any, List
+from app.analytics.column_stats import ColumnStats
+
+# Columns the loader must materialize for detect_outliers
+OUTLIER_COLUMNS = {"dtypes": ["number"]}
 
 
 def safe_float(value):
@@ -20,10 +24,11 @@ def safe_int(value):
     return int(value)
 
 
-def detect_outliers(df: pd.DataFrame) -> Dict[str, Any]:
+def detect_outliers(df: pd.DataFrame, column_stats: ColumnStats = None) -> Dict[str, Any]:
     """Comprehensive outlier detection using multiple methods"""
     
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    column_stats = column_stats if column_stats is not None else ColumnStats(df)
+    numeric_cols = column_stats.numeric_columns
     
     if numeric_cols.empty:
         return {
@@ -44,6 +49,7 @@ def detect_outliers(df: pd.DataFrame) -> Dict[str, Any]:
         series = df[col].dropna()
         if len(series) < 4:  # Need minimum data points
             continue
+        quantiles = column_stats.quantiles.loc[col]
             
         column_outliers = {
             "column": col,
@@ -52,7 +58,7 @@ def detect_outliers(df: pd.DataFrame) -> Dict[str, Any]:
         }
         
         # Method 1: IQR (Interquartile Range)
-        iqr_outliers = _detect_iqr_outliers(series)
+        iqr_outliers = _detect_iqr_outliers(series, quantiles["p25"], quantiles["p75"])
         column_outliers["methods"]["iqr"] = iqr_outliers
         
         # Method 2: Z-Score
@@ -60,7 +66,9 @@ def detect_outliers(df: pd.DataFrame) -> Dict[str, Any]:
         column_outliers["methods"]["zscore"] = zscore_outliers
         
         # Method 3: Modified Z-Score (using median)
-        modified_zscore_outliers = _detect_modified_zscore_outliers(series)
+        modified_zscore_outliers = _detect_modified_zscore_outliers(
+            series, median_val=quantiles["p50"], mad=quantiles["mad"]
+        )
         column_outliers["methods"]["modified_zscore"] = modified_zscore_outliers
         
         # Method 4: Isolation Forest (if enough data)
@@ -109,10 +117,12 @@ def detect_outliers(df: pd.DataFrame) -> Dict[str, Any]:
     }
 
 
-def _detect_iqr_outliers(series: pd.Series) -> Dict[str, Any]:
-    """Detect outliers using Interquartile Range method"""
-    Q1 = series.quantile(0.25)
-    Q3 = series.quantile(0.75)
+def _detect_iqr_outliers(series: pd.Series, Q1: float = None, Q3: float = None) -> Dict[str, Any]:
+    """Detect outliers using Interquartile Range method; quartiles computed in a batch
+    elsewhere can be passed in"""
+    if Q1 is None or Q3 is None:
+        Q1 = series.quantile(0.25)
+        Q3 = series.quantile(0.75)
     IQR = Q3 - Q1
     
     lower_bound = Q1 - 1.5 * IQR
@@ -172,10 +182,14 @@ def _detect_zscore_outliers(series: pd.Series, threshold: float = 3.0) -> Dict[s
     }
 
 
-def _detect_modified_zscore_outliers(series: pd.Series, threshold: float = 3.5) -> Dict[str, Any]:
-    """Detect outliers using Modified Z-Score (median-based)"""
-    median_val = series.median()
-    mad = np.median(np.abs(series - median_val))  # Median Absolute Deviation
+def _detect_modified_zscore_outliers(
+    series: pd.Series, threshold: float = 3.5, median_val: float = None, mad: float = None
+) -> Dict[str, Any]:
+    """Detect outliers using Modified Z-Score (median-based); the median and MAD computed
+    in a batch elsewhere can be passed in"""
+    if median_val is None or mad is None:
+        median_val = series.median()
+        mad = np.median(np.abs(series - median_val))  # Median Absolute Deviation
     
     if mad == 0:
         return {
@@ -2,6 +2,7 @@
 
 import pandas as pd
 import math
+from app.analytics.column_stats import ColumnStats
 
 
 def safe_float(value):
@@ -18,34 +19,29 @@ def safe_int(value):
     return int(value)
 
 
-def profile_columns(df: pd.DataFrame):
-    total_rows = len(df)
+def profile_columns(df: pd.DataFrame, column_stats: ColumnStats = None):
+    column_stats = column_stats if column_stats is not None else ColumnStats(df)
+    total_rows = column_stats.row_count
     profiles = {}
 
     for col in df.columns:
         series = df[col]
 
         # Missing values - both count and percentage
-        missing_count = series.isnull().sum()
+        missing_count = column_stats.missing[col]
         missing_percentage = safe_float((missing_count / total_rows) * 100) if total_rows > 0 else 0
 
         # Unique values
-        unique_count = series.nunique(dropna=True)
+        unique_count = column_stats.unique[col]
 
         # Detect type
-        if pd.api.types.is_numeric_dtype(series):
-            col_type = "numeric"
-        elif pd.api.types.is_datetime64_any_dtype(series):
-            col_type = "datetime"
-        else:
-            col_type = "categorical"
-
-        # Sample values (safe, non-null)
+        col_type = column_stats.kinds[col]
+
+        # Sample values (safe, non-null); only the first few distinct values are stringified
         samples = (
-            series.dropna()
+            pd.Series(series.dropna().unique()[:3])
             .astype(str)
-            .unique()
-            .tolist()[:3]
+            .tolist()
         )
 
         profiles[col] = {
@@ -55,5 +51,7 @@ def profile_columns(df: pd.DataFrame):
             "unique_count": safe_int(unique_count),
             "samples": samples
         }
+        if col in column_stats.approximate_columns:
+            profiles[col]["unique_count_approximate"] = True
 
     return profiles
@@ -1,24 +1,157 @@
 from fastapi import APIRouter, Depends, HTTPException
 from app.db.database import get_db
 from app.core.auth import get_current_user
-from app.analytics.loader import load_dataset
-from app.analytics.cleaning import clean_dataset
+from app.analytics.loader import (
+    get_dataset_document,
+    load_cleaned_dataset_async,
+    load_dataset_sketch_async,
+    merge_column_requirements
+)
+from app.analytics.frame_cache import invalidate as invalidate_frames
+from app.analytics.column_stats import ColumnStats
 from app.analytics.profiling import profile_columns
 from app.analytics.statistics import descriptive_statistics
 from app.analytics.categorical_stats import categorical_statistics
 from app.analytics.health import dataset_health_score
-from app.analytics.advanced_stats import calculate_advanced_metrics
-from app.analytics.correlation import calculate_correlation_matrix, calculate_categorical_associations, detect_multicollinearity
-from app.analytics.outliers import detect_outliers
+from app.analytics.advanced_stats import calculate_advanced_metrics, ADVANCED_METRICS_COLUMNS
+from app.analytics.correlation import (
+    calculate_correlation_matrix,
+    calculate_categorical_associations,
+    correlation_block,
+    detect_multicollinearity,
+    CORRELATION_COLUMNS,
+    CORRELATION_PAGE_COLUMNS,
+    MAX_CORRELATION_PAGE_COLUMNS,
+    ASSOCIATION_COLUMNS,
+    MULTICOLLINEARITY_COLUMNS
+)
+from app.analytics.outliers import detect_outliers, OUTLIER_COLUMNS
+from app.analytics.sketches import sketch_analytics
 from app.analytics.serialization import prepare_analytics_for_storage, validate_mongodb_document
 from app.analytics.cache import (
     get_cached_analytics,
     save_cached_analytics
 )
+from app.core.concurrency import get_http_client, run_analytics
+from fastapi.concurrency import run_in_threadpool
 from datetime import datetime
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
+
+def _generate_analytics(dataset_id: str, cleaned_df, cleaning_summary: dict, metadata: dict):
+    """Build the full, storage-safe analytics document for a cleaned dataset (CPU-bound)"""
+    # Generate comprehensive analytics with individual error handling
+    analytics = {
+        "summary": {
+            "dataset_id": dataset_id,
+            "total_rows": len(cleaned_df),
+            "total_columns": len(cleaned_df.columns),
+            "filename": metadata.get("original_filename", metadata.get("filename")),
+            "uploaded_at": metadata.get("uploaded_at"),
+            "analysis_timestamp": datetime.utcnow().isoformat()
+        },
+        "cleaning_summary": cleaning_summary,
+    }
+
+    # Null counts, distinct counts and type classes are computed once for every section
+    try:
+        column_stats = ColumnStats(cleaned_df)
+    except Exception as e:
+        print(f"Column statistics failed: {e}")
+        column_stats = None
+
+    # Add each analytics component with individual error handling
+    try:
+        analytics["columns"] = profile_columns(cleaned_df, column_stats=column_stats)
+    except Exception as e:
+        print(f"Column profiling failed: {e}")
+        analytics["columns"] = {}
+
+    try:
+        analytics["statistics"] = descriptive_statistics(cleaned_df, column_stats=column_stats)
+    except Exception as e:
+        print(f"Statistics calculation failed: {e}")
+        analytics["statistics"] = {}
+
+    try:
+        analytics["categorical"] = categorical_statistics(cleaned_df, column_stats=column_stats)
+    except Exception as e:
+        print(f"Categorical analysis failed: {e}")
+        analytics["categorical"] = {}
+
+    try:
+        analytics["health"] = dataset_health_score(
+            cleaned_df, duplicates=cleaning_summary.get("duplicates_removed"), column_stats=column_stats
+        )
+    except Exception as e:
+        print(f"Health score calculation failed: {e}")
+        analytics["health"] = {"score": 0, "issues": ["Health calculation failed"]}
+
+    try:
+        analytics["advanced_metrics"] = calculate_advanced_metrics(cleaned_df, column_stats=column_stats)
+    except Exception as e:
+        print(f"Advanced metrics calculation failed: {e}")
+        analytics["advanced_metrics"] = {}
+
+    try:
+        analytics["correlation_analysis"] = calculate_correlation_matrix(cleaned_df)
+    except Exception as e:
+        print(f"Correlation analysis failed: {e}")
+        analytics["correlation_analysis"] = {
+            "correlation_matrix": {},
+            "strong_correlations": [],
+            "correlation_summary": {"total_pairs": 0}
+        }
+
+    try:
+        analytics["categorical_associations"] = calculate_categorical_associations(cleaned_df)
+    except Exception as e:
+        print(f"Categorical associations failed: {e}")
+        analytics["categorical_associations"] = {
+            "categorical_associations": {},
+            "strong_associations": []
+        }
+
+    try:
+        analytics["outlier_analysis"] = detect_outliers(cleaned_df, column_stats=column_stats)
+    except Exception as e:
+        print(f"Outlier detection failed: {e}")
+        analytics["outlier_analysis"] = {
+            "outlier_summary": {"total_outliers": 0, "affected_columns": 0},
+            "outliers_by_column": {}
+        }
+
+    try:
+        analytics["multicollinearity"] = detect_multicollinearity(cleaned_df)
+    except Exception as e:
+        print(f"Multicollinearity detection failed: {e}")
+        analytics["multicollinearity"] = {"multicollinearity_detected": False}
+
+    # Prepare analytics for MongoDB storage (fix serialization issues)
+    safe_analytics = prepare_analytics_for_storage(analytics)
+
+    # Validate before saving
+    if not validate_mongodb_document(safe_analytics):
+        print("Warning: Analytics document failed validation, using fallback")
+        # Create a minimal safe version
+        safe_analytics = {
+            "summary": analytics["summary"],
+            "health": analytics.get("health", {}),
+            "error": "Some analytics data could not be serialized safely"
+        }
+
+    return safe_analytics
+
+
+def _correlation_analysis(cleaned_df):
+    return (
+        calculate_correlation_matrix(cleaned_df),
+        calculate_categorical_associations(cleaned_df),
+        detect_multicollinearity(cleaned_df)
+    )
+
+
 @router.get("/{dataset_id}/summary")
 async def get_analytics_summary(
     dataset_id: str,
@@ -29,108 +162,24 @@ async def get_analytics_summary(
     
     try:
         # Check cache first
-        cached = get_cached_analytics(db, dataset_id, current_user)
+        cached = await run_in_threadpool(get_cached_analytics, db, dataset_id, current_user)
         if cached:
             return cached["analytics"]
 
-        # Load and analyze dataset
-        df, metadata = load_dataset(dataset_id, current_user, db)
-        
-        cleaned_df, cleaning_summary = clean_dataset(df)
-
-        # Generate comprehensive analytics with individual error handling
-        analytics = {
-            "summary": {
-                "dataset_id": dataset_id,
-                "total_rows": len(cleaned_df),
-                "total_columns": len(cleaned_df.columns),
-                "filename": metadata.get("original_filename", metadata.get("filename")),
-                "uploaded_at": metadata.get("uploaded_at"),
-                "analysis_timestamp": datetime.utcnow().isoformat()
-            },
-            "cleaning_summary": cleaning_summary,
-        }
-        
-        # Add each analytics component with individual error handling
-        try:
-            analytics["columns"] = profile_columns(cleaned_df)
-        except Exception as e:
-            print(f"Column profiling failed: {e}")
-            analytics["columns"] = {}
-        
-        try:
-            analytics["statistics"] = descriptive_statistics(cleaned_df)
-        except Exception as e:
-            print(f"Statistics calculation failed: {e}")
-            analytics["statistics"] = {}
-        
-        try:
-            analytics["categorical"] = categorical_statistics(cleaned_df)
-        except Exception as e:
-            print(f"Categorical analysis failed: {e}")
-            analytics["categorical"] = {}
-        
-        try:
-            analytics["health"] = dataset_health_score(cleaned_df)
-        except Exception as e:
-            print(f"Health score calculation failed: {e}")
-            analytics["health"] = {"score": 0, "issues": ["Health calculation failed"]}
-        
-        try:
-            analytics["advanced_metrics"] = calculate_advanced_metrics(cleaned_df)
-        except Exception as e:
-            print(f"Advanced metrics calculation failed: {e}")
-            analytics["advanced_metrics"] = {}
-        
-        try:
-            analytics["correlation_analysis"] = calculate_correlation_matrix(cleaned_df)
-        except Exception as e:
-            print(f"Correlation analysis failed: {e}")
-            analytics["correlation_analysis"] = {
-                "correlation_matrix": {},
-                "strong_correlations": [],
-                "correlation_summary": {"total_pairs": 0}
-            }
-        
-        try:
-            analytics["categorical_associations"] = calculate_categorical_associations(cleaned_df)
-        except Exception as e:
-            print(f"Categorical associations failed: {e}")
-            analytics["categorical_associations"] = {
-                "categorical_associations": {},
-                "strong_associations": []
-            }
-        
-        try:
-            analytics["outlier_analysis"] = detect_outliers(cleaned_df)
-        except Exception as e:
-            print(f"Outlier detection failed: {e}")
-            analytics["outlier_analysis"] = {
-                "outlier_summary": {"total_outliers": 0, "affected_columns": 0},
-                "outliers_by_column": {}
-            }
-        
-        try:
-            analytics["multicollinearity"] = detect_multicollinearity(cleaned_df)
-        except Exception as e:
-            print(f"Multicollinearity detection failed: {e}")
-            analytics["multicollinearity"] = {"multicollinearity_detected": False}
-
-        # Prepare analytics for MongoDB storage (fix serialization issues)
-        safe_analytics = prepare_analytics_for_storage(analytics)
-        
-        # Validate before saving
-        if not validate_mongodb_document(safe_analytics):
-            print("Warning: Analytics document failed validation, using fallback")
-            # Create a minimal safe version
-            safe_analytics = {
-                "summary": analytics["summary"],
-                "health": analytics.get("health", {}),
-                "error": "Some analytics data could not be serialized safely"
-            }
+        sketched = await load_dataset_sketch_async(dataset_id, current_user, db)
+        if sketched is not None:
+            # Large datasets are summarized from their sketches without loading any rows
+            sketch, metadata = sketched
+            safe_analytics = await run_analytics(sketch_analytics, dataset_id, sketch, metadata)
+        else:
+            # Load and analyze dataset off the event loop
+            cleaned_df, cleaning_summary, metadata = await load_cleaned_dataset_async(dataset_id, current_user, db)
+            safe_analytics = await run_analytics(
+                _generate_analytics, dataset_id, cleaned_df, cleaning_summary, metadata
+            )
 
         # Cache results
-        save_cached_analytics(db, dataset_id, current_user, safe_analytics)
+        await run_in_threadpool(save_cached_analytics, db, dataset_id, current_user, safe_analytics)
         
         return safe_analytics
 
@@ -151,12 +200,12 @@ async def get_advanced_analytics(
     
     try:
         # Load dataset
-        df, metadata = load_dataset(dataset_id, current_user, db)
-        
-        cleaned_df, _ = clean_dataset(df)
+        cleaned_df, _, metadata = await load_cleaned_dataset_async(
+            dataset_id, current_user, db, columns=ADVANCED_METRICS_COLUMNS
+        )
         
         # Calculate advanced metrics
-        advanced_metrics = calculate_advanced_metrics(cleaned_df)
+        advanced_metrics = await run_analytics(calculate_advanced_metrics, cleaned_df)
         
         return {
             "dataset_id": dataset_id,
@@ -182,23 +231,16 @@ async def refresh_analytics_cache(
     
     try:
         # Verify dataset ownership
-        datasets_collection = db.datasets
-        dataset = datasets_collection.find_one({
-            "dataset_id": dataset_id,
-            "user_email": current_user
-        })
-        
-        if not dataset:
-            raise HTTPException(status_code=404, detail="Dataset not found")
+        await run_in_threadpool(get_dataset_document, dataset_id, current_user, db)
         
         # Clear existing cache
-        cache_collection = db.analytics_cache
-        result = cache_collection.delete_many({
-            "dataset_id": dataset_id,
-            "user_email": current_user
-        })
+        await run_in_threadpool(
+            db.analytics_cache.delete_many,
+            {"dataset_id": dataset_id, "user_email": current_user}
+        )
         
-        # Regenerate analytics
+        # Regenerate analytics from a fresh load
+        invalidate_frames(dataset_id)
         return await get_analytics_summary(dataset_id, current_user, db)
         
     except HTTPException:
@@ -215,12 +257,16 @@ async def get_correlation_analysis(
 ):
     """Get detailed correlation analysis"""
     try:
-        df, metadata = load_dataset(dataset_id, current_user, db)
-        cleaned_df, _ = clean_dataset(df)
+        required_columns = merge_column_requirements(
+            CORRELATION_COLUMNS, ASSOCIATION_COLUMNS, MULTICOLLINEARITY_COLUMNS
+        )
+        cleaned_df, _, metadata = await load_cleaned_dataset_async(
+            dataset_id, current_user, db, columns=required_columns
+        )
         
-        correlation_data = calculate_correlation_matrix(cleaned_df)
-        categorical_associations = calculate_categorical_associations(cleaned_df)
-        multicollinearity = detect_multicollinearity(cleaned_df)
+        correlation_data, categorical_associations, multicollinearity = await run_analytics(
+            _correlation_analysis, cleaned_df
+        )
         
         return {
             "dataset_id": dataset_id,
@@ -233,6 +279,37 @@ async def get_correlation_analysis(
         raise HTTPException(status_code=500, detail=f"Correlation analysis failed: {str(e)}")
 
 
+@router.get("/{dataset_id}/correlation/blocks")
+async def get_correlation_block(
+    dataset_id: str,
+    row_block: int = 0,
+    col_block: int = 0,
+    block_columns: int = CORRELATION_PAGE_COLUMNS,
+    current_user: str = Depends(get_current_user),
+    db = Depends(get_db)
+):
+    """Get one page of the numeric correlation matrix, for datasets too wide to return it whole"""
+    if row_block < 0 or col_block < 0 or block_columns < 1 or block_columns > MAX_CORRELATION_PAGE_COLUMNS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Blocks must be >= 0 and block_columns between 1 and {MAX_CORRELATION_PAGE_COLUMNS}"
+        )
+
+    try:
+        cleaned_df, _, _ = await load_cleaned_dataset_async(
+            dataset_id, current_user, db, columns=CORRELATION_COLUMNS
+        )
+        block = await run_analytics(correlation_block, cleaned_df, row_block, col_block, block_columns)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Correlation block failed: {str(e)}")
+
+    return {"dataset_id": dataset_id, **block}
+
+
 @router.get("/{dataset_id}/outliers")
 async def get_outlier_analysis(
     dataset_id: str,
@@ -241,10 +318,11 @@ async def get_outlier_analysis(
 ):
     """Get detailed outlier analysis"""
     try:
-        df, metadata = load_dataset(dataset_id, current_user, db)
-        cleaned_df, _ = clean_dataset(df)
+        cleaned_df, _, metadata = await load_cleaned_dataset_async(
+            dataset_id, current_user, db, columns=OUTLIER_COLUMNS
+        )
         
-        outlier_data = detect_outliers(cleaned_df)
+        outlier_data = await run_analytics(detect_outliers, cleaned_df)
         
         return {
             "dataset_id": dataset_id,
@@ -264,38 +342,20 @@ async def refresh_analytics_cache(
     """Refresh cached analytics for a dataset"""
     try:
         # Clear existing cache
-        db.analytics_cache.delete_many({
-            "dataset_id": dataset_id,
-            "user_email": current_user
-        })
+        await run_in_threadpool(
+            db.analytics_cache.delete_many,
+            {"dataset_id": dataset_id, "user_email": current_user}
+        )
         
         # Regenerate analytics
-        df, metadata = load_dataset(dataset_id, current_user, db)
-        cleaned_df, cleaning_summary = clean_dataset(df)
-        
-        analytics = {
-            "summary": {
-                "dataset_id": dataset_id,
-                "total_rows": len(cleaned_df),
-                "total_columns": len(cleaned_df.columns),
-                "filename": metadata.get("original_filename", metadata.get("filename")),
-                "uploaded_at": metadata.get("uploaded_at"),
-                "analysis_timestamp": datetime.utcnow().isoformat()
-            },
-            "cleaning_summary": cleaning_summary,
-            "columns": profile_columns(cleaned_df),
-            "statistics": descriptive_statistics(cleaned_df),
-            "categorical": categorical_statistics(cleaned_df),
-            "health": dataset_health_score(cleaned_df),
-            "advanced_metrics": calculate_advanced_metrics(cleaned_df),
-            "correlation_analysis": calculate_correlation_matrix(cleaned_df),
-            "categorical_associations": calculate_categorical_associations(cleaned_df),
-            "outlier_analysis": detect_outliers(cleaned_df),
-            "multicollinearity": detect_multicollinearity(cleaned_df)
-        }
+        invalidate_frames(dataset_id)
+        cleaned_df, cleaning_summary, metadata = await load_cleaned_dataset_async(dataset_id, current_user, db)
+        analytics = await run_analytics(
+            _generate_analytics, dataset_id, cleaned_df, cleaning_summary, metadata
+        )
         
         # Cache new results
-        save_cached_analytics(db, dataset_id, current_user, analytics)
+        await run_in_threadpool(save_cached_analytics, db, dataset_id, current_user, analytics)
         
         return {
             "message": "Analytics cache refreshed successfully",
@@ -318,28 +378,27 @@ async def get_ai_insights(
 ):
     """Generate AI insights using Groq API (free)"""
     try:
-        import httpx
         import os
 
         groq_key = os.getenv("GROQ_API_KEY")
         if not groq_key:
             raise HTTPException(status_code=500, detail="AI service not configured")
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.groq.com/openai/v1/chat/completions",
-                headers={
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {groq_key}"
-                },
-                json={
-                    "model": "llama-3.1-8b-instant",
-                    "max_tokens": 1000,
-                    "messages": [{"role": "user", "content": request_data.prompt}]
-                },
-                timeout=30.0
-            )
-            return response.json()
+        client = get_http_client()
+        response = await client.post(
+            "https://api.groq.com/openai/v1/chat/completions",
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {groq_key}"
+            },
+            json={
+                "model": "llama-3.1-8b-instant",
+                "max_tokens": 1000,
+                "messages": [{"role": "user", "content": request_data.prompt}]
+            },
+            timeout=30.0
+        )
+        return response.json()
 
     except HTTPException:
         raise
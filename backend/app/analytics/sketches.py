@@ -0,0 +1,442 @@
+# app/analytics/sketches.py
+
+import base64
+import math
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from app.analytics.cardinality import TOP_LEVELS, plan_column
+from app.analytics.cleaning import normalize_column_name
+from app.analytics.profiling import safe_float as profile_float
+from app.analytics.serialization import prepare_analytics_for_storage
+from app.analytics.statistics import safe_float as statistic_float
+
+# HyperLogLog precision: 2^14 one-byte registers, standard error 1.04 / sqrt(2^14) ~ 0.8%
+HLL_PRECISION = 14
+
+# t-digest compression: about this many centroids, finest at the tails
+DIGEST_COMPRESSION = 200
+
+# Space-Saving summary size; far more than the top values any section reports
+TOPK_CAPACITY = 256
+
+
+class MomentSketch:
+    """Count, mean, variance (Welford / Chan), min and max of a stream of numbers"""
+
+    def __init__(self, count=0, mean=0.0, m2=0.0, minimum=None, maximum=None):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def update(self, values: np.ndarray):
+        if len(values) == 0:
+            return
+        mean = float(values.mean())
+        self.merge(MomentSketch(
+            len(values), mean, float(((values - mean) ** 2).sum()), float(values.min()), float(values.max())
+        ))
+
+    def merge(self, other: "MomentSketch"):
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.minimum, self.maximum = other.minimum, other.maximum
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    @property
+    def std(self):
+        """Sample standard deviation, as Series.std()"""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else float("nan")
+
+    def to_dict(self) -> dict:
+        return {"count": self.count, "mean": self.mean, "m2": self.m2, "min": self.minimum, "max": self.maximum}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MomentSketch":
+        return cls(data["count"], data["mean"], data["m2"], data["min"], data["max"])
+
+
+class QuantileDigest:
+    """Merging t-digest: weighted centroids, small at the tails, that answer quantile queries"""
+
+    def __init__(self, means=None, weights=None, compression: int = DIGEST_COMPRESSION):
+        self.means = np.asarray(means if means is not None else [], dtype=np.float64)
+        self.weights = np.asarray(weights if weights is not None else [], dtype=np.float64)
+        self.compression = compression
+
+    def update(self, values: np.ndarray):
+        if len(values) == 0:
+            return
+        self.means = np.concatenate([self.means, values.astype(np.float64)])
+        self.weights = np.concatenate([self.weights, np.ones(len(values))])
+        self._compress()
+
+    def merge(self, other: "QuantileDigest"):
+        self.means = np.concatenate([self.means, other.means])
+        self.weights = np.concatenate([self.weights, other.weights])
+        self._compress()
+
+    def _compress(self):
+        """Merge neighbouring centroids that fall into the same unit of the arcsine scale"""
+        if len(self.means) <= self.compression:
+            return
+
+        order = np.argsort(self.means, kind="stable")
+        means, weights = self.means[order], self.weights[order]
+        midpoints = (np.cumsum(weights) - weights / 2) / weights.sum()
+        scale = np.floor(self.compression / np.pi * np.arcsin(2 * midpoints - 1))
+        starts = np.flatnonzero(np.r_[True, np.diff(scale) > 0])
+
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q: float, minimum: float, maximum: float) -> float:
+        if len(self.means) == 0:
+            return float("nan")
+
+        order = np.argsort(self.means, kind="stable")
+        means, weights = self.means[order], self.weights[order]
+        midpoints = (np.cumsum(weights) - weights / 2) / weights.sum()
+        return float(np.interp(q, np.r_[0.0, midpoints, 1.0], np.r_[minimum, means, maximum]))
+
+    def to_dict(self) -> dict:
+        return {"means": self.means.tolist(), "weights": self.weights.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuantileDigest":
+        return cls(data["means"], data["weights"])
+
+
+class DistinctSketch:
+    """HyperLogLog distinct counter over 64-bit value hashes"""
+
+    def __init__(self, registers=None, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = registers if registers is not None else np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, hashes: np.ndarray):
+        if len(hashes) == 0:
+            return
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        remaining_bits = 64 - self.precision
+        index = (hashes >> np.uint64(remaining_bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << remaining_bits) - 1)
+
+        # Position of the leftmost 1-bit; float64 holds every value below 2^53 exactly
+        with np.errstate(divide="ignore"):
+            rank = remaining_bits - np.floor(np.log2(rest.astype(np.float64)))
+        rank = np.where(rest == 0, remaining_bits + 1, rank).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "DistinctSketch"):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+
+        # Linear counting is more accurate while many registers are still empty
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros > 0:
+            estimate = m * math.log(m / zeros)
+
+        return int(round(estimate))
+
+    def to_dict(self) -> dict:
+        return {"precision": self.precision, "registers": base64.b64encode(self.registers.tobytes()).decode()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DistinctSketch":
+        registers = np.frombuffer(base64.b64decode(data["registers"]), dtype=np.uint8).copy()
+        return cls(registers, data["precision"])
+
+
+class TopKSketch:
+    """Mergeable Space-Saving summary of the most frequent values.
+
+    Counts are lower bounds; a value's true count exceeds its estimate by at most `error`.
+    """
+
+    def __init__(self, counts: dict = None, error: int = 0, capacity: int = TOPK_CAPACITY):
+        self.counts = counts or {}
+        self.error = error
+        self.capacity = capacity
+
+    def update(self, value_counts: pd.Series):
+        """Add a chunk's exact value counts, keeping only what the summary can hold"""
+        value_counts = value_counts.sort_values(ascending=False)
+        error = int(value_counts.iloc[self.capacity]) if len(value_counts) > self.capacity else 0
+        head = value_counts.iloc[:self.capacity]
+        self.merge(TopKSketch({str(value): int(count) for value, count in head.items()}, error))
+
+    def merge(self, other: "TopKSketch"):
+        counts = dict(self.counts)
+        for value, count in other.counts.items():
+            counts[value] = counts.get(value, 0) + count
+
+        error = self.error + other.error
+        if len(counts) > self.capacity:
+            ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+            error += ranked[self.capacity][1]
+            counts = dict(ranked[:self.capacity])
+
+        self.counts = counts
+        self.error = error
+
+    def top(self, n: int) -> list:
+        return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:n]
+
+    def to_dict(self) -> dict:
+        return {"counts": self.counts, "error": self.error}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TopKSketch":
+        return cls(data["counts"], data["error"])
+
+
+def _hash_values(values: np.ndarray) -> np.ndarray:
+    # Values are already distinct, so factorizing them first would only cost time
+    return pd.util.hash_array(values, categorize=False)
+
+
+class ColumnSketch:
+    """Mergeable summary of one column: missing count, a few samples, distinct count, and
+    moments and quantiles for numbers or frequent values for text"""
+
+    def __init__(self, kind: str):
+        self.kind = kind  # "number", "bool" or "text"
+        self.missing = 0
+        self.samples = []
+        self.distinct = DistinctSketch()
+        self.moments = MomentSketch() if kind == "number" else None
+        self.digest = QuantileDigest() if kind == "number" else None
+        self.top_values = TopKSketch() if kind == "text" else None
+
+    @classmethod
+    def for_series(cls, series: pd.Series) -> "ColumnSketch":
+        if pd.api.types.is_bool_dtype(series):
+            return cls("bool")
+        if pd.api.types.is_numeric_dtype(series):
+            return cls("number")
+        return cls("text")
+
+    def update(self, series: pd.Series):
+        self.missing += int(series.isna().sum())
+        values = series.dropna()
+        if values.empty:
+            return
+
+        if self.kind == "text":
+            # Counted once per distinct value, stripped as clean_dataset strips text
+            value_counts = values.value_counts()
+            value_counts = value_counts[value_counts > 0]
+            value_counts = value_counts.groupby(value_counts.index.astype(str).str.strip()).sum()
+            self.top_values.update(value_counts)
+            distinct = value_counts.index.to_numpy(dtype=object)
+        else:
+            numbers = values.to_numpy(dtype=np.float64)
+            if self.kind == "number":
+                self.moments.update(numbers)
+                self.digest.update(numbers)
+            distinct = np.unique(numbers)
+
+        self.distinct.update(_hash_values(distinct))
+        if len(self.samples) < 3:
+            for value in pd.unique(values.to_numpy())[:3]:
+                text = str(value).strip() if self.kind == "text" else str(value)
+                if text not in self.samples and len(self.samples) < 3:
+                    self.samples.append(text)
+
+    def merge(self, other: "ColumnSketch"):
+        self.missing += other.missing
+        self.samples = (self.samples + [s for s in other.samples if s not in self.samples])[:3]
+        self.distinct.merge(other.distinct)
+        if self.kind == "number":
+            self.moments.merge(other.moments)
+            self.digest.merge(other.digest)
+        elif self.kind == "text":
+            self.top_values.merge(other.top_values)
+
+    def to_dict(self) -> dict:
+        return {
+            "kind": self.kind,
+            "missing": self.missing,
+            "samples": self.samples,
+            "distinct": self.distinct.to_dict(),
+            "moments": self.moments.to_dict() if self.moments else None,
+            "digest": self.digest.to_dict() if self.digest else None,
+            "top_values": self.top_values.to_dict() if self.top_values else None
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ColumnSketch":
+        sketch = cls(data["kind"])
+        sketch.missing = data["missing"]
+        sketch.samples = data["samples"]
+        sketch.distinct = DistinctSketch.from_dict(data["distinct"])
+        if data["moments"] is not None:
+            sketch.moments = MomentSketch.from_dict(data["moments"])
+            sketch.digest = QuantileDigest.from_dict(data["digest"])
+        if data["top_values"] is not None:
+            sketch.top_values = TopKSketch.from_dict(data["top_values"])
+        return sketch
+
+
+class DatasetSketch:
+    """Column sketches of a whole dataset, built chunk by chunk in one streaming pass and
+    mergeable with the sketch of any other chunk of the same columns"""
+
+    def __init__(self):
+        self.rows = 0
+        self.columns = {}
+
+    def update(self, df: pd.DataFrame):
+        self.rows += len(df)
+        for col in df.columns:
+            name = normalize_column_name(str(col))
+            if name not in self.columns:
+                self.columns[name] = ColumnSketch.for_series(df[col])
+            self.columns[name].update(df[col])
+
+    def merge(self, other: "DatasetSketch"):
+        self.rows += other.rows
+        for name, column in other.columns.items():
+            if name in self.columns:
+                self.columns[name].merge(column)
+            else:
+                self.columns[name] = column
+
+    def to_dict(self) -> dict:
+        return {"rows": self.rows, "columns": {name: column.to_dict() for name, column in self.columns.items()}}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DatasetSketch":
+        sketch = cls()
+        sketch.rows = data["rows"]
+        sketch.columns = {name: ColumnSketch.from_dict(column) for name, column in data["columns"].items()}
+        return sketch
+
+
+def _distinct_count(sketch: DatasetSketch, column: ColumnSketch) -> int:
+    """HyperLogLog estimate capped at the column's non-null rows, which it can overshoot"""
+    return min(column.distinct.estimate(), sketch.rows - column.missing)
+
+
+def profile_from_sketch(sketch: DatasetSketch) -> dict:
+    """The `columns` section (as profile_columns) from sketches"""
+    profiles = {}
+    for name, column in sketch.columns.items():
+        profiles[name] = {
+            "type": "categorical" if column.kind == "text" else "numeric",
+            "missing_count": column.missing,
+            "missing_percentage": profile_float((column.missing / sketch.rows) * 100) if sketch.rows > 0 else 0,
+            "unique_count": _distinct_count(sketch, column),
+            "samples": column.samples
+        }
+    return profiles
+
+
+def statistics_from_sketch(sketch: DatasetSketch) -> dict:
+    """The `statistics` section (as descriptive_statistics) from sketches"""
+    stats = {}
+    for name, column in sketch.columns.items():
+        if column.kind != "number" or column.moments.count == 0:
+            continue
+
+        moments = column.moments
+        values = {
+            "mean": statistic_float(moments.mean),
+            "median": statistic_float(column.digest.quantile(0.5, moments.minimum, moments.maximum)),
+            "min": statistic_float(moments.minimum),
+            "max": statistic_float(moments.maximum),
+            "std": statistic_float(moments.std),
+            "p25": statistic_float(column.digest.quantile(0.25, moments.minimum, moments.maximum)),
+            "p75": statistic_float(column.digest.quantile(0.75, moments.minimum, moments.maximum))
+        }
+        stats[name] = {key: value for key, value in values.items() if value is not None}
+    return stats
+
+
+def categorical_from_sketch(sketch: DatasetSketch, top_n: int = 8) -> dict:
+    """The `categorical` section (as categorical_statistics) from sketches"""
+    results = {}
+    for name, column in sketch.columns.items():
+        if column.kind != "text" or not column.top_values.counts:
+            continue
+
+        unique_count = _distinct_count(sketch, column)
+        non_null = sketch.rows - column.missing
+        top_share = sum(count for _, count in column.top_values.top(TOP_LEVELS)) / non_null if non_null > 0 else 1.0
+        action, reason = plan_column(unique_count, non_null, top_share)
+        if action == "prune":
+            results[name] = {
+                "unique_values": unique_count,
+                "top_values": {},
+                "top_values_detailed": [],
+                "high_cardinality": True,
+                "pruned_reason": reason
+            }
+            continue
+
+        top_values = column.top_values.top(top_n)
+        results[name] = {
+            "unique_values": unique_count,
+            "top_values": {value: count for value, count in top_values},
+            "top_values_detailed": [
+                {
+                    "value": value,
+                    "count": count,
+                    "percentage": round((count / sketch.rows) * 100, 2) if sketch.rows > 0 else 0
+                }
+                for value, count in top_values
+            ],
+            "high_cardinality": unique_count > 20
+        }
+        if action == "bucket":
+            results[name]["other_count"] = non_null - sum(count for _, count in top_values)
+    return results
+
+
+def sketch_analytics(dataset_id: str, sketch: DatasetSketch, metadata: dict) -> dict:
+    """Column, statistics and categorical sections from upload-time sketches, for datasets
+    too large to load; sections that need the rows themselves are left out.
+
+    Sketches see every stored row, while frame mode analyses the deduplicated frame: the row
+    total drops the duplicate rows counted at upload, and the summary flags that the column
+    figures are estimates that still count the duplicates.
+    """
+    duplicate_rows = metadata.get("duplicate_rows")
+    analytics = {
+        "summary": {
+            "dataset_id": dataset_id,
+            "total_rows": sketch.rows - (duplicate_rows or 0),
+            "total_columns": len(sketch.columns),
+            "filename": metadata.get("original_filename", metadata.get("filename")),
+            "uploaded_at": metadata.get("uploaded_at"),
+            "analysis_timestamp": datetime.utcnow().isoformat(),
+            "analysis_mode": "sketch",
+            "approximate": True,
+            "rows_before_deduplication": sketch.rows,
+            "duplicate_rows": duplicate_rows,
+            # Unknown duplicate counts (None) are reported as possibly included
+            "counts_include_duplicates": duplicate_rows != 0
+        },
+        "columns": profile_from_sketch(sketch),
+        "statistics": statistics_from_sketch(sketch),
+        "categorical": categorical_from_sketch(sketch)
+    }
+
+    return prepare_analytics_for_storage(analytics)
@@ -3,6 +3,7 @@
 import pandas as pd
 import numpy as np
 import math
+from app.analytics.column_stats import ColumnStats
 
 
 def safe_float(value):
@@ -12,25 +13,27 @@ def safe_float(value):
     return float(round(value, 3))
 
 
-def descriptive_statistics(df: pd.DataFrame):
+def descriptive_statistics(df: pd.DataFrame, column_stats: ColumnStats = None):
     stats = {}
 
-    numeric_cols = df.select_dtypes(include=["number"]).columns
+    column_stats = column_stats if column_stats is not None else ColumnStats(df)
 
-    for col in numeric_cols:
-        series = df[col].dropna()
-
-        if series.empty:
+    for col in column_stats.numeric_columns:
+        # All-missing columns have no statistics
+        if column_stats.missing[col] == column_stats.row_count:
             continue
 
-        # Calculate statistics with NaN handling
+        series = df[col]
+        quantiles = column_stats.quantiles.loc[col]
+
+        # Calculate statistics with NaN handling; percentiles come from the batched sort
         mean_val = safe_float(series.mean())
-        median_val = safe_float(series.median())
+        median_val = safe_float(quantiles["p50"])
         min_val = safe_float(series.min())
         max_val = safe_float(series.max())
         std_val = safe_float(series.std())
-        p25_val = safe_float(series.quantile(0.25))
-        p75_val = safe_float(series.quantile(0.75))
+        p25_val = safe_float(quantiles["p25"])
+        p75_val = safe_float(quantiles["p75"])
 
         # Only include non-null values
         stats[col] = {}
@@ -5,3 +5,57 @@ load_dotenv()
 
 PROJECT_NAME = "InsightX"
 ENV = os.getenv("ENV", "development")
+
+# Local dataset storage
+DATASET_STORAGE_PATH = os.getenv("DATASET_STORAGE_PATH", "uploaded_datasets")
+
+# Where raw dataset files are kept: "cloudinary" or "local" (files under LOCAL_STORAGE_DIR)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "cloudinary")
+LOCAL_STORAGE_DIR = os.getenv("LOCAL_STORAGE_DIR", DATASET_STORAGE_PATH)
+
+# Upload ingestion: files are streamed to disk and converted in bounded chunks
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_FILE_SIZE_MB", "0")) * 1024 * 1024  # 0 = no limit
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+INGEST_CHUNK_ROWS = int(os.getenv("INGEST_CHUNK_ROWS", "100000"))
+
+# Resumable upload sessions: numbered chunks are staged here until completion
+UPLOAD_SESSION_DIR = os.getenv("UPLOAD_SESSION_DIR", os.path.join(DATASET_STORAGE_PATH, ".uploads"))
+UPLOAD_SESSION_MAX_CHUNK_BYTES = int(os.getenv("UPLOAD_SESSION_MAX_CHUNK_BYTES", str(64 * 1024 * 1024)))
+# Sessions without a new chunk for this long are deleted together with their chunks
+UPLOAD_SESSION_TTL_SECONDS = int(os.getenv("UPLOAD_SESSION_TTL_SECONDS", str(24 * 60 * 60)))  # 1 day
+
+# Preview snapshot stored at upload: first rows plus a stratified random sample
+PREVIEW_HEAD_ROWS = int(os.getenv("PREVIEW_HEAD_ROWS", "100"))
+PREVIEW_SAMPLE_ROWS = int(os.getenv("PREVIEW_SAMPLE_ROWS", "100"))
+
+# "memory" reads sidecars into private frames, "mmap" maps them from the OS page cache
+DATASET_LOAD_MODE = os.getenv("DATASET_LOAD_MODE", "memory")
+
+# On-disk blob cache in front of remote dataset storage
+BLOB_CACHE_DIR = os.getenv("BLOB_CACHE_DIR", os.path.join(DATASET_STORAGE_PATH, ".blob_cache"))
+BLOB_CACHE_MAX_BYTES = int(os.getenv("BLOB_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))  # 1GB
+
+# Per-process cache of cleaned DataFrames shared by the analytics routes
+FRAME_CACHE_MAX_BYTES = int(os.getenv("FRAME_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))  # 512MB
+
+# Store repetitive text as category and downcast numbers in cleaned frames
+COMPACT_FRAMES = os.getenv("COMPACT_FRAMES", "false").lower() == "true"
+
+# Count distinct values of clearly high-cardinality columns with HyperLogLog (~0.8% error)
+APPROX_DISTINCT_COUNTS = os.getenv("APPROX_DISTINCT_COUNTS", "false").lower() == "true"
+
+# Datasets with at least this many rows get their summary from upload-time column
+# sketches instead of loading the frame (0 = always load)
+SKETCH_ANALYTICS_MIN_ROWS = int(os.getenv("SKETCH_ANALYTICS_MIN_ROWS", "0"))
+
+# Frames with more numeric columns than this get their correlations in memory-bounded
+# tiles, reporting strong pairs and paged matrix blocks instead of the full matrix
+CORRELATION_BLOCK_MIN_COLUMNS = int(os.getenv("CORRELATION_BLOCK_MIN_COLUMNS", "500"))
+CORRELATION_BLOCK_BYTES = int(os.getenv("CORRELATION_BLOCK_BYTES", str(256 * 1024 * 1024)))  # 256MB
+
+# Processes that compute categorical association pairs (1 = in the request thread)
+ASSOCIATION_WORKERS = int(os.getenv("ASSOCIATION_WORKERS", "1"))
+
+# Concurrency for the async analytics routes
+ANALYTICS_MAX_WORKERS = int(os.getenv("ANALYTICS_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
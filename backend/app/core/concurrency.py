@@ -0,0 +1,73 @@
+import asyncio
+import functools
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import httpx
+from app.config import ANALYTICS_MAX_WORKERS, ASSOCIATION_WORKERS, HTTP_MAX_CONNECTIONS
+
+# Bounded pool for CPU-heavy pandas work so it never runs on the event loop
+_analytics_executor = ThreadPoolExecutor(
+    max_workers=ANALYTICS_MAX_WORKERS,
+    thread_name_prefix="analytics"
+)
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+_http_client = None
+
+
+async def run_analytics(func, *args, **kwargs):
+    """Run a blocking analytics call in the bounded executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_analytics_executor, functools.partial(func, *args, **kwargs))
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Shared worker processes for analytics that parallelize across cores, started on first use"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # Spawned rather than forked: the server process already runs executor threads
+            _process_pool = ProcessPoolExecutor(
+                max_workers=ASSOCIATION_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _process_pool
+
+
+def discard_process_pool(pool: ProcessPoolExecutor):
+    """Drop a pool whose worker died (BrokenProcessPool) so the next get_process_pool starts
+    a new one; a pool another caller already replaced is left alone"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared async HTTP client with a pooled connection limit"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_CONNECTIONS
+            ),
+            follow_redirects=True
+        )
+    return _http_client
+
+
+async def shutdown():
+    """Close the pooled HTTP client and stop the analytics executor and worker processes"""
+    global _http_client, _process_pool
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    _analytics_executor.shutdown(wait=False)
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False)
+        _process_pool = None
@@ -0,0 +1,209 @@
+# app/datasets/append.py
+
+import os
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+import pandas as pd
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+from app.analytics.cleaning import compute_row_hashes, duplicate_mask
+from app.analytics.loader import stage_cleaned_extension
+from app.analytics.sketches import DatasetSketch
+from app.datasets.columnar import (
+    apply_dtypes, cleaned_path, has_sidecar, read_row_hashes, read_sketch, record_batch_rows,
+    remove_sketch, stage_sidecar_append, write_sketch
+)
+from app.datasets.schema import schema_dtypes
+from app.datasets.storage import storage_for
+
+# An append lease older than this is taken to belong to a worker that died mid-append
+APPEND_LEASE_SECONDS = 15 * 60
+
+
+def _acquire_lease(datasets, dataset_id: str, user_email: str):
+    """Mark a dataset as being appended to, so appends from any worker run one at a time and
+    each extends the version before it. Returns (dataset document, lease token)."""
+    token = uuid.uuid4().hex
+    now = datetime.utcnow()
+    dataset = datasets.find_one_and_update(
+        {
+            "dataset_id": dataset_id,
+            "user_email": user_email,
+            "$or": [
+                {"append_lease": {"$exists": False}},
+                {"append_lease.acquired_at": {"$lt": now - timedelta(seconds=APPEND_LEASE_SECONDS)}}
+            ]
+        },
+        {"$set": {"append_lease": {"token": token, "acquired_at": now}}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if dataset is None:
+        if datasets.find_one({"dataset_id": dataset_id, "user_email": user_email}, {"_id": 1}) is None:
+            raise HTTPException(status_code=404, detail="Dataset not found")
+        raise HTTPException(status_code=409, detail="Another append to this dataset is in progress")
+    return dataset, token
+
+
+def _release_lease(datasets, dataset_id: str, token: str):
+    datasets.update_one(
+        {"dataset_id": dataset_id, "append_lease.token": token},
+        {"$unset": {"append_lease": ""}}
+    )
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+
+def read_append_rows(path: str, dataset: dict):
+    """Parse a CSV of new rows against a dataset's columns and schema.
+
+    Returns (text frame in the dataset's column order, frame typed like the sidecar).
+    """
+    columns = dataset.get("columns") or []
+    raw = pd.read_csv(path, dtype=str)
+
+    if set(raw.columns) != set(columns):
+        missing = [col for col in columns if col not in raw.columns]
+        extra = [col for col in raw.columns if col not in columns]
+        raise HTTPException(
+            status_code=400,
+            detail=f"Appended columns do not match the dataset (missing: {missing}, unexpected: {extra})"
+        )
+    if raw.empty:
+        raise HTTPException(status_code=400, detail="No rows to append")
+
+    raw = raw[columns]
+    try:
+        typed = apply_dtypes(raw.copy(), schema_dtypes(dataset["schema"]), strict=True)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Appended rows do not match the dataset schema: {e}")
+
+    return raw, typed
+
+
+def append_dataset_rows(datasets, dataset_id: str, user_email: str, path: str) -> dict:
+    """Add the rows of a CSV on local disk to a dataset.
+
+    Only the new rows are parsed, hashed, sketched and cleaned. The raw file takes them as
+    appended bytes, and staged copies of the sidecar and cleaned copy take them as one more
+    record batch; the staged files replace the current ones only once the dataset document
+    has been updated, so a failed append leaves the dataset as it was. Returns the dataset
+    document fields that changed and the number of rows appended.
+
+    Still proportional to the whole dataset: reading the row-hash index (8 bytes a row),
+    copying the sidecar's and cleaned copy's record batches into the staged files (without
+    decoding them), re-uploading the raw file to remote storage, and the full analytics of
+    datasets too small for sketch summaries, which are recomputed on the next request.
+    """
+    dataset, token = _acquire_lease(datasets, dataset_id, user_email)
+    try:
+        return _append_rows(datasets, dataset, token, path)
+    finally:
+        _release_lease(datasets, dataset_id, token)
+
+
+def _append_rows(datasets, dataset: dict, token: str, path: str) -> dict:
+    dataset_id = dataset["dataset_id"]
+    if not dataset["filename"].endswith('.csv'):
+        raise HTTPException(status_code=400, detail="Only CSV rows can be appended to CSV datasets")
+    if not has_sidecar(dataset) or not dataset.get("schema"):
+        raise HTTPException(status_code=400, detail="Dataset must be re-uploaded before rows can be appended")
+
+    sidecar = dataset["sidecar_path"]
+    first_row = dataset.get("row_count") or 0
+    if sum(record_batch_rows(sidecar)) != first_row:
+        raise HTTPException(
+            status_code=409,
+            detail="Dataset files do not match its record; re-upload it before appending"
+        )
+
+    raw, typed = read_append_rows(path, dataset)
+
+    # Duplicates are found against the stored row-hash index, not by rehashing old rows
+    row_hashes = compute_row_hashes(typed)
+    duplicates = duplicate_mask(row_hashes, read_row_hashes(sidecar))
+
+    sketch = read_sketch(dataset_id)
+    if sketch is not None and sketch.rows == first_row:
+        delta = DatasetSketch()
+        delta.update(typed)
+        sketch.merge(delta)
+    else:
+        # A sketch that missed earlier rows would misreport every later summary
+        sketch = None
+
+    storage = storage_for(dataset)
+    appended = None
+    staged_sidecar = staged_cleaned = None
+    committed = False
+    try:
+        fd, rows_path = tempfile.mkstemp(prefix=".tmp-", suffix=".csv", dir=os.path.dirname(path) or ".")
+        os.close(fd)
+        try:
+            raw.to_csv(rows_path, header=False, index=False)
+            appended = storage.append(dataset, rows_path)
+        finally:
+            os.remove(rows_path)
+
+        staged_sidecar = stage_sidecar_append(sidecar, typed, row_hashes)
+        staged_cleaned = stage_cleaned_extension(dataset, typed, duplicates, appended["content_hash"])
+
+        duplicate_rows = dataset.get("duplicate_rows")
+        updates = {
+            "file_url": appended["location"],
+            "file_path": appended["location"],
+            "storage_key": appended["storage_key"],
+            "content_hash": appended["content_hash"],
+            "file_size": appended["file_size"],
+            "row_count": first_row + len(typed),
+            "duplicate_rows": duplicate_rows + int(duplicates.sum()) if duplicate_rows is not None else None,
+            "row_groups": dataset["row_groups"] + [len(typed)] if dataset.get("row_groups") is not None else None
+        }
+
+        # Commit only if the document is still the version the rows were appended to
+        result = datasets.update_one(
+            {
+                "dataset_id": dataset_id,
+                "append_lease.token": token,
+                "row_count": dataset.get("row_count"),
+                "content_hash": dataset.get("content_hash")
+            },
+            {"$set": updates, "$unset": {"append_lease": ""}}
+        )
+        if result.matched_count == 0:
+            raise HTTPException(status_code=409, detail="Dataset changed during the append; try again")
+        committed = True
+    finally:
+        if not committed:
+            for staged in (staged_sidecar, staged_cleaned):
+                if staged:
+                    _remove(staged)
+            if appended is not None:
+                try:
+                    storage.discard_append(dataset, appended)
+                except Exception as e:
+                    print(f"Append rollback failed for {dataset_id}: {e}")
+
+    os.replace(staged_sidecar, sidecar)
+    if staged_cleaned:
+        os.replace(staged_cleaned, cleaned_path(dataset_id))
+    else:
+        _remove(cleaned_path(dataset_id))
+    if sketch is not None:
+        write_sketch(dataset_id, sketch)
+    else:
+        remove_sketch(dataset_id)
+
+    try:
+        storage.finish_append(dataset, appended)
+    except Exception as e:
+        print(f"Previous raw file cleanup skipped for {dataset_id}: {e}")
+
+    return {**updates, "rows_appended": len(typed)}
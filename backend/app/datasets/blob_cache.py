@@ -0,0 +1,180 @@
+# app/datasets/blob_cache.py
+
+import asyncio
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+import requests
+from app.config import BLOB_CACHE_DIR, BLOB_CACHE_MAX_BYTES
+from app.core.concurrency import get_http_client
+
+_lock = threading.Lock()
+_TMP_PREFIX = ".tmp-"
+
+
+def content_hash(content: bytes) -> str:
+    """SHA-256 digest of a dataset file, stored with the dataset metadata"""
+    return hashlib.sha256(content).hexdigest()
+
+
+def _blob_path(dataset_id: str, digest: str) -> str:
+    return os.path.join(BLOB_CACHE_DIR, f"{dataset_id}__{digest}")
+
+
+def dataset_digest(dataset: dict) -> str:
+    """Content hash for a dataset, falling back to its (versioned) URL for legacy records"""
+    if dataset.get("content_hash"):
+        return dataset["content_hash"]
+    file_url = dataset.get("file_url") or dataset.get("file_path") or ""
+    return hashlib.sha256(file_url.encode("utf-8")).hexdigest()
+
+
+def get_blob(dataset_id: str, digest: str):
+    """Return the cached file path for a dataset version, or None on a miss"""
+    path = _blob_path(dataset_id, digest)
+    try:
+        # Touch on hit so eviction order follows last use
+        os.utime(path, None)
+        return path
+    except FileNotFoundError:
+        return None
+
+
+def put_blob(dataset_id: str, digest: str, content: bytes):
+    """Atomically write a blob into the cache and evict down to the byte budget"""
+    if len(content) > BLOB_CACHE_MAX_BYTES:
+        return None
+
+    os.makedirs(BLOB_CACHE_DIR, exist_ok=True)
+    path = _blob_path(dataset_id, digest)
+
+    # Write to a temp file in the same directory, then rename over the final name
+    fd, tmp_path = tempfile.mkstemp(prefix=_TMP_PREFIX, dir=BLOB_CACHE_DIR)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    _evict(keep=path)
+    return path
+
+
+def adopt_blob(dataset_id: str, digest: str, local_path: str):
+    """Move a file already on local disk into the cache instead of copying its bytes"""
+    if os.path.getsize(local_path) > BLOB_CACHE_MAX_BYTES:
+        os.remove(local_path)
+        return None
+
+    os.makedirs(BLOB_CACHE_DIR, exist_ok=True)
+    path = _blob_path(dataset_id, digest)
+    shutil.move(local_path, path)
+
+    _evict(keep=path)
+    return path
+
+
+def _evict(keep: str = None):
+    """Remove least recently used blobs until the cache fits its byte budget"""
+    with _lock:
+        entries = []
+        total = 0
+        try:
+            names = os.listdir(BLOB_CACHE_DIR)
+        except FileNotFoundError:
+            return
+
+        for name in names:
+            if name.startswith(_TMP_PREFIX):
+                continue
+            path = os.path.join(BLOB_CACHE_DIR, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= BLOB_CACHE_MAX_BYTES:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+
+
+def invalidate(dataset_id: str):
+    """Drop every cached version of a dataset"""
+    prefix = f"{dataset_id}__"
+    try:
+        names = os.listdir(BLOB_CACHE_DIR)
+    except FileNotFoundError:
+        return
+
+    for name in names:
+        if name.startswith(prefix):
+            try:
+                os.remove(os.path.join(BLOB_CACHE_DIR, name))
+            except FileNotFoundError:
+                pass
+
+
+def fetch_dataset_file(dataset: dict, timeout: int = 30):
+    """Return a readable source (local path or buffer) for a dataset's raw file"""
+    file_url = dataset.get("file_url") or dataset.get("file_path")
+    if not file_url:
+        raise ValueError("Dataset file information missing")
+
+    if not file_url.startswith("http"):
+        return file_url
+
+    digest = dataset_digest(dataset)
+    cached_path = get_blob(dataset.get("dataset_id"), digest)
+    if cached_path:
+        return cached_path
+
+    response = requests.get(file_url, timeout=timeout)
+    response.raise_for_status()
+    return _store_download(dataset, digest, response.content)
+
+
+async def fetch_dataset_file_async(dataset: dict, timeout: int = 30):
+    """fetch_dataset_file for async routes: downloads over the pooled HTTP client"""
+    file_url = dataset.get("file_url") or dataset.get("file_path")
+    if not file_url:
+        raise ValueError("Dataset file information missing")
+
+    if not file_url.startswith("http"):
+        return file_url
+
+    digest = dataset_digest(dataset)
+    cached_path = get_blob(dataset.get("dataset_id"), digest)
+    if cached_path:
+        return cached_path
+
+    response = await get_http_client().get(file_url, timeout=timeout)
+    response.raise_for_status()
+    return await asyncio.to_thread(_store_download, dataset, digest, response.content)
+
+
+def _store_download(dataset: dict, digest: str, content: bytes):
+    """Cache a freshly downloaded file and return a readable source for it"""
+    if dataset.get("content_hash") and content_hash(content) != digest:
+        # Remote file no longer matches the recorded version; serve it uncached
+        print(f"Blob cache warning: content hash mismatch for {dataset.get('dataset_id')}")
+        return io.BytesIO(content)
+
+    return put_blob(dataset.get("dataset_id"), digest, content) or io.BytesIO(content)
@@ -0,0 +1,476 @@
+# app/datasets/columnar.py
+
+import json
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from app.config import DATASET_STORAGE_PATH
+from app.analytics.cleaning import ROW_HASH_COLUMN, compute_row_hashes, duplicate_mask
+from app.analytics.sketches import DatasetSketch
+
+SIDECAR_FORMAT = "arrow"
+
+
+def read_raw_dataset(
+    source, filename: str, usecols: list = None, memory_map: bool = False, dtypes: dict = None
+) -> pd.DataFrame:
+    """Parse a raw CSV/Excel file, typed by the stored schema's `dtypes` when there is one
+    and by the automatic numeric conversion otherwise"""
+    if filename.endswith(".csv"):
+        # Map CSVs that are already on local disk instead of reading them through a buffer
+        df = pd.read_csv(
+            source,
+            usecols=usecols,
+            dtype=str if dtypes is not None else None,
+            memory_map=memory_map and isinstance(source, str)
+        )
+    elif filename.endswith((".xlsx", ".xls")):
+        df = pd.read_excel(source, usecols=usecols)
+    else:
+        raise ValueError("Unsupported file format")
+
+    if dtypes is not None:
+        return apply_dtypes(df, dtypes)
+
+    return coerce_numeric_columns(df)
+
+
+def coerce_numeric_columns(df: pd.DataFrame, threshold: float = 0.7) -> pd.DataFrame:
+    """Convert object columns to numeric when most of their values parse as numbers"""
+    for col in df.columns:
+        try:
+            if df[col].dtype == "object":
+                converted = pd.to_numeric(df[col], errors="coerce")
+                non_null_ratio = converted.notna().sum() / max(len(converted), 1)
+                if non_null_ratio > threshold:
+                    df[col] = converted
+        except Exception:
+            pass
+
+    return df
+
+
+def row_index(df: pd.DataFrame):
+    """Row hashes and duplicate count for a parsed frame, or (None, None) if unavailable"""
+    try:
+        hashes = compute_row_hashes(df)
+    except Exception as e:
+        print(f"Row hashing skipped: {e}")
+        return None, None
+
+    return hashes, int(duplicate_mask(hashes).sum())
+
+
+def sidecar_path(dataset_id: str) -> str:
+    return os.path.join(DATASET_STORAGE_PATH, f"{dataset_id}.{SIDECAR_FORMAT}")
+
+
+def write_sidecar(dataset_id: str, df: pd.DataFrame, row_hashes=None):
+    """Store the parsed, typed frame as an Arrow IPC file; returns the path or None"""
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+    except ImportError:
+        return None
+
+    path = sidecar_path(dataset_id)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(path) or ".")
+    os.close(fd)
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if row_hashes is not None:
+            table = table.append_column(ROW_HASH_COLUMN, pa.array(row_hashes, type=pa.uint64()))
+        # Uncompressed so the file can be memory-mapped directly
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Sidecar write skipped for {dataset_id}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+    return path
+
+
+BOOL_VALUES = {"True": True, "False": False, "TRUE": True, "FALSE": False, "true": True, "false": False}
+
+
+def apply_dtypes(df: pd.DataFrame, dtypes: dict, strict: bool = False) -> pd.DataFrame:
+    """Convert columns to the dtypes recorded in a dataset schema.
+
+    With `strict`, values that do not fit the dtype raise ValueError instead of being
+    coerced: unparseable numbers, fractional or missing values in integer columns, and
+    anything but the recognised spellings in boolean columns.
+    """
+    for col, dtype in dtypes.items():
+        if col not in df.columns or str(df[col].dtype) == dtype:
+            continue
+        if strict:
+            _check_values(df[col], col, dtype)
+        if dtype in ("int64", "float64"):
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(dtype)
+        elif dtype == "bool" and df[col].dtype == "object":
+            df[col] = df[col].map(BOOL_VALUES).astype(bool)
+    return df
+
+
+def _check_values(values: pd.Series, col: str, dtype: str):
+    """Raise ValueError naming a few values of `values` that `dtype` cannot hold exactly"""
+    if dtype in ("int64", "float64"):
+        converted = pd.to_numeric(values, errors="coerce")
+        bad = values.notna() & converted.isna()
+        if dtype == "int64":
+            # Integer columns were inferred without missing values and hold whole numbers only
+            bad |= values.isna() | (converted.notna() & (converted % 1 != 0))
+    elif dtype == "bool":
+        bad = ~values.isin(BOOL_VALUES.keys())
+    else:
+        return
+
+    if bad.any():
+        samples = values[bad].head(3).tolist()
+        raise ValueError(f"column '{col}' expects {dtype} values, got {samples}")
+
+
+def write_csv_sidecar(dataset_id: str, path: str, chunk_rows: int, dtypes: dict, sketch: DatasetSketch = None):
+    """Convert a CSV on disk to the Arrow sidecar chunk by chunk with constant memory,
+    using the dtypes from infer_csv_schema, and feed every chunk to `sketch`; returns the
+    path or None"""
+    columns = list(dtypes.keys())
+
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return None
+
+    arrow_types = {"int64": pa.int64(), "float64": pa.float64(), "bool": pa.bool_(), "object": pa.string()}
+    schema = pa.schema(
+        [pa.field(col, arrow_types[dtype]) for col, dtype in dtypes.items()]
+        + [pa.field(ROW_HASH_COLUMN, pa.uint64())]
+    )
+
+    target = sidecar_path(dataset_id)
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(target) or ".")
+    os.close(fd)
+
+    try:
+        with pa.ipc.new_file(tmp_path, schema) as writer:
+            for chunk in pd.read_csv(path, dtype=str, chunksize=chunk_rows):
+                chunk = apply_dtypes(chunk, dtypes)
+                arrays = [pa.array(chunk[col], type=schema.field(col).type, from_pandas=True) for col in columns]
+                arrays.append(pa.array(compute_row_hashes(chunk), type=pa.uint64()))
+                writer.write_batch(pa.record_batch(arrays, schema=schema))
+                if sketch is not None:
+                    sketch.update(chunk)
+        os.replace(tmp_path, target)
+    except Exception as e:
+        print(f"Sidecar write skipped for {dataset_id}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+    return target
+
+
+def _stage_ipc_append(path: str, extra_batch_fn, metadata: dict = None) -> str:
+    """Copy every record batch of an Arrow IPC file (without decoding it) plus the batch
+    `extra_batch_fn(schema)` returns into a temporary file next to it, and return that
+    file's path; the caller moves it over `path` with os.replace once the change is
+    committed, or deletes it"""
+    import pyarrow as pa
+
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(path) or ".")
+    os.close(fd)
+    try:
+        with pa.memory_map(path, "r") as source:
+            reader = pa.ipc.open_file(source)
+            schema = reader.schema
+            if metadata is not None:
+                schema = schema.with_metadata({
+                    **(schema.metadata or {}),
+                    **{key.encode(): value.encode() for key, value in metadata.items()}
+                })
+            with pa.ipc.new_file(tmp_path, schema) as writer:
+                for i in range(reader.num_record_batches):
+                    writer.write_batch(reader.get_batch(i))
+                writer.write_batch(extra_batch_fn(schema))
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return tmp_path
+
+
+def stage_sidecar_append(path: str, df: pd.DataFrame, row_hashes) -> str:
+    """Staged copy of a sidecar with rows, typed like it, and their row hashes added as one
+    new record batch (see _stage_ipc_append)"""
+    import pyarrow as pa
+
+    def batch(schema):
+        arrays = [
+            pa.array(row_hashes, type=pa.uint64()) if field.name == ROW_HASH_COLUMN
+            else pa.array(df[field.name], type=field.type, from_pandas=True)
+            for field in schema
+        ]
+        return pa.record_batch(arrays, schema=schema)
+
+    return _stage_ipc_append(path, batch)
+
+
+def read_sidecar(path: str, memory_map: bool = False, columns: list = None) -> pd.DataFrame:
+    """Load a typed frame (optionally only some columns) from its Arrow IPC sidecar"""
+    if columns is not None:
+        # A stored row index always comes along with the selected columns
+        columns = columns + [name for name in _index_columns(path) if name not in columns]
+
+    if not memory_map:
+        df = pd.read_feather(path, columns=columns)
+    else:
+        import pyarrow as pa
+
+        # Numeric columns without nulls come back as read-only views onto the mapped
+        # file, so concurrent requests and workers share the same physical pages
+        source = pa.memory_map(path, "r")
+        table = pa.ipc.open_file(source).read_all()
+        if columns is not None:
+            table = table.select(columns)
+        df = table.to_pandas(split_blocks=True)
+
+    # Arrow string nulls arrive as None; read_csv gives NaN
+    for col in df.select_dtypes(include="object").columns:
+        if df[col].hasnans:
+            df[col] = df[col].fillna(np.nan)
+
+    return df
+
+
+def read_row_hashes(path: str):
+    """The stored row-hash index of a sidecar as a uint64 array, or None if it has none"""
+    import pyarrow as pa
+
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+        if ROW_HASH_COLUMN not in table.column_names:
+            return None
+        return table.column(ROW_HASH_COLUMN).to_numpy()
+
+
+def record_batch_rows(path: str) -> list:
+    """Row count of every record batch in a sidecar, in file order"""
+    import pyarrow as pa
+
+    with pa.memory_map(path, "r") as source:
+        reader = pa.ipc.open_file(source)
+        return [reader.get_batch(i).num_rows for i in range(reader.num_record_batches)]
+
+
+def read_sidecar_rows(path: str, offset: int, limit: int, row_groups: list = None) -> pd.DataFrame:
+    """Read rows [offset, offset + limit) touching only the record batches that hold them"""
+    import pyarrow as pa
+
+    if row_groups is None:
+        row_groups = record_batch_rows(path)
+
+    with pa.memory_map(path, "r") as source:
+        reader = pa.ipc.open_file(source)
+        batches = []
+        batch_start = 0
+        for i, batch_rows in enumerate(row_groups):
+            batch_end = batch_start + batch_rows
+            if batch_end > offset and batch_start < offset + limit:
+                start = max(offset - batch_start, 0)
+                stop = min(offset + limit, batch_end) - batch_start
+                batches.append(reader.get_batch(i).slice(start, stop - start))
+            if batch_end >= offset + limit:
+                break
+            batch_start = batch_end
+
+        table = pa.Table.from_batches(batches, schema=reader.schema)
+
+    return _drop_row_hashes(table.to_pandas())
+
+
+def sample_sidecar_rows(path: str, sample_rows: int, seed: int = 42) -> pd.DataFrame:
+    """Random sample stratified by record batch, so every part of the file is represented"""
+    import pyarrow as pa
+
+    with pa.memory_map(path, "r") as source:
+        reader = pa.ipc.open_file(source)
+        row_groups = [reader.get_batch(i).num_rows for i in range(reader.num_record_batches)]
+        total_rows = sum(row_groups)
+        rng = np.random.default_rng(seed)
+
+        batches = []
+        for i, batch_rows in enumerate(row_groups):
+            take = min(batch_rows, int(round(sample_rows * batch_rows / max(total_rows, 1))))
+            if take > 0:
+                indices = np.sort(rng.choice(batch_rows, size=take, replace=False))
+                batches.append(reader.get_batch(i).take(pa.array(indices)))
+
+        table = pa.Table.from_batches(batches, schema=reader.schema)
+
+    return _drop_row_hashes(table.to_pandas())
+
+
+def _drop_row_hashes(df: pd.DataFrame) -> pd.DataFrame:
+    return df.drop(columns=[ROW_HASH_COLUMN], errors="ignore")
+
+
+def sidecar_schema(path: str) -> list:
+    """(column name, dtype class) pairs read from the sidecar footer without loading data"""
+    schema = _read_schema(path)
+    index_columns = _index_columns(path, schema)
+
+    return [(field.name, _dtype_class(field.type)) for field in schema if field.name not in index_columns]
+
+
+def _read_schema(path: str):
+    import pyarrow as pa
+
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).schema
+
+
+def _index_columns(path: str, schema=None) -> list:
+    """Columns pandas stored a non-default row index in"""
+    schema = schema if schema is not None else _read_schema(path)
+    pandas_metadata = schema.pandas_metadata or {}
+    return [name for name in pandas_metadata.get("index_columns", []) if isinstance(name, str)]
+
+
+def cleaned_path(dataset_id: str) -> str:
+    return os.path.join(DATASET_STORAGE_PATH, f"{dataset_id}.cleaned.{SIDECAR_FORMAT}")
+
+
+def write_cleaned(dataset_id: str, df: pd.DataFrame, metadata: dict):
+    """Store a cleaned frame, its row labels and string `metadata` as an Arrow IPC file;
+    returns the path or None"""
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+    except ImportError:
+        return None
+
+    path = cleaned_path(dataset_id)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(path) or ".")
+    os.close(fd)
+    try:
+        # Row labels survive deduplication so outlier indices still point at source rows
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            **{key.encode(): value.encode() for key, value in metadata.items()}
+        })
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Cleaned dataset write skipped for {dataset_id}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+    return path
+
+
+def stage_cleaned_append(path: str, df: pd.DataFrame, metadata: dict) -> str:
+    """Staged copy of a cleaned file with cleaned rows (and their row labels) added and its
+    string metadata replaced (see _stage_ipc_append); raises if the rows do not fit the
+    stored schema"""
+    import pyarrow as pa
+
+    def batch(schema):
+        table = pa.Table.from_pandas(df, schema=schema, preserve_index=True)
+        return pa.record_batch([column.combine_chunks() for column in table.columns], schema=schema)
+
+    return _stage_ipc_append(path, batch, metadata)
+
+
+def read_file_metadata(path: str) -> dict:
+    """String metadata stored with write_cleaned, read from the file footer"""
+    metadata = _read_schema(path).metadata or {}
+    return {key.decode(): value.decode() for key, value in metadata.items() if key != b"pandas"}
+
+
+def _dtype_class(arrow_type) -> str:
+    """Map an Arrow type onto the pandas select_dtypes class analytics modules ask for"""
+    import pyarrow as pa
+
+    if pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type):
+        return "number"
+    if pa.types.is_boolean(arrow_type):
+        return "bool"
+    if pa.types.is_dictionary(arrow_type):
+        return "category"
+    if pa.types.is_timestamp(arrow_type) or pa.types.is_date(arrow_type):
+        return "datetime"
+    return "object"
+
+
+def has_sidecar(dataset: dict) -> bool:
+    path = dataset.get("sidecar_path")
+    return bool(path) and os.path.exists(path)
+
+
+def sketch_path(dataset_id: str) -> str:
+    return os.path.join(DATASET_STORAGE_PATH, f"{dataset_id}.sketch.json")
+
+
+def write_sketch(dataset_id: str, sketch: DatasetSketch):
+    """Store a dataset's column sketches as JSON; returns the path or None"""
+    path = sketch_path(dataset_id)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(sketch.to_dict(), f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Sketch write skipped for {dataset_id}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+    return path
+
+
+def read_sketch(dataset_id: str):
+    """A dataset's stored column sketches, or None if it has none"""
+    path = sketch_path(dataset_id)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path) as f:
+            return DatasetSketch.from_dict(json.load(f))
+    except Exception as e:
+        print(f"Sketch read skipped for {dataset_id}: {e}")
+        return None
+
+
+def remove_sketch(dataset_id: str):
+    try:
+        os.remove(sketch_path(dataset_id))
+    except FileNotFoundError:
+        pass
+
+
+def remove_sidecar(dataset: dict):
+    """Remove a dataset's sidecar, its cleaned copy and its sketches"""
+    paths = [
+        dataset.get("sidecar_path") or sidecar_path(dataset.get("dataset_id", "")),
+        cleaned_path(dataset.get("dataset_id", "")),
+        sketch_path(dataset.get("dataset_id", ""))
+    ]
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,116 @@
+# app/datasets/ingest.py
+
+import hashlib
+import json
+import os
+import tempfile
+import pandas as pd
+from fastapi import HTTPException
+from app.config import (
+    DATASET_STORAGE_PATH, INGEST_CHUNK_ROWS, MAX_UPLOAD_BYTES, PREVIEW_HEAD_ROWS,
+    PREVIEW_SAMPLE_ROWS, UPLOAD_CHUNK_BYTES
+)
+from app.analytics.cleaning import duplicate_mask
+from app.analytics.sketches import DatasetSketch
+from app.datasets.columnar import (
+    read_raw_dataset, read_row_hashes, read_sidecar_rows, record_batch_rows, row_index,
+    sample_sidecar_rows, write_csv_sidecar, write_sidecar, write_sketch
+)
+from app.datasets.schema import frame_schema, infer_csv_schema, schema_dtypes
+
+
+def raw_file_path(dataset_id: str, filename: str) -> str:
+    return os.path.join(DATASET_STORAGE_PATH, f"{dataset_id}{os.path.splitext(filename)[1]}")
+
+
+def save_upload(fileobj, dest_path: str):
+    """Copy an upload to local storage chunk by chunk, hashing as it goes.
+
+    Returns (size in bytes, SHA-256 hex digest).
+    """
+    os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(dest_path) or ".")
+
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = fileobj.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if MAX_UPLOAD_BYTES and size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"File too large. Maximum size is {MAX_UPLOAD_BYTES // (1024 * 1024)}MB"
+                    )
+                hasher.update(chunk)
+                f.write(chunk)
+        os.replace(tmp_path, dest_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return size, hasher.hexdigest()
+
+
+def ingest_dataset_file(dataset_id: str, path: str, filename: str) -> dict:
+    """Infer the column schema and build the columnar sidecar, column sketches and row/column
+    metadata for a raw file on local disk"""
+    sketch = DatasetSketch()
+    if filename.endswith(".csv"):
+        schema, row_count = infer_csv_schema(path, INGEST_CHUNK_ROWS)
+        sidecar = write_csv_sidecar(dataset_id, path, INGEST_CHUNK_ROWS, schema_dtypes(schema), sketch=sketch)
+        # Duplicates are counted from the sidecar's row-hash index, 8 bytes per row
+        row_hashes = read_row_hashes(sidecar) if sidecar else None
+        duplicate_rows = int(duplicate_mask(row_hashes).sum()) if row_hashes is not None else None
+    else:
+        # Workbooks cannot be parsed incrementally, but Excel caps a sheet at ~1M rows
+        df = read_raw_dataset(path, filename)
+        schema = frame_schema(df)
+        row_hashes, duplicate_rows = row_index(df)
+        sidecar = write_sidecar(dataset_id, df, row_hashes)
+        sketch.update(df)
+        row_count = len(df)
+
+    # A sketch is only complete if every chunk reached it
+    if sketch.rows == row_count:
+        write_sketch(dataset_id, sketch)
+
+    columns = [column["name"] for column in schema]
+
+    row_groups = record_batch_rows(sidecar) if sidecar else None
+
+    return {
+        "sidecar_path": sidecar,
+        "row_count": row_count,
+        "columns": columns,
+        "schema": schema,
+        "duplicate_rows": duplicate_rows,
+        "row_groups": row_groups,
+        "preview": build_preview(path, filename, sidecar, row_groups)
+    }
+
+
+def frame_records(df: pd.DataFrame) -> list:
+    """JSON-safe row dicts (NaN -> None, numpy scalars -> Python) for responses and Mongo"""
+    return json.loads(df.to_json(orient="records", date_format="iso"))
+
+
+def build_preview(path: str, filename: str, sidecar: str = None, row_groups: list = None) -> dict:
+    """Snapshot of the first rows and a random sample, stored so /preview never reparses the file"""
+    if sidecar:
+        head = read_sidecar_rows(sidecar, 0, PREVIEW_HEAD_ROWS, row_groups)
+        sample = sample_sidecar_rows(sidecar, PREVIEW_SAMPLE_ROWS)
+    else:
+        reader = pd.read_csv if filename.endswith(".csv") else pd.read_excel
+        head = reader(path, nrows=PREVIEW_HEAD_ROWS)
+        sample = None
+
+    return {
+        "columns": head.columns.tolist(),
+        "head": frame_records(head),
+        "sample": frame_records(sample) if sample is not None else None
+    }
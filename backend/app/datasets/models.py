@@ -14,3 +14,11 @@ class DatasetInDB(BaseModel):
     columns: List[str]
     row_count: int
     uploaded_at: datetime = datetime.utcnow()
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    total_size: Optional[int] = None
+
+class UploadSessionComplete(BaseModel):
+    chunk_count: int
+    sha256: Optional[str] = None
@@ -1,94 +1,295 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Header, Request
 import pandas as pd
 import os
 import uuid
-import cloudinary
-import cloudinary.uploader
 from datetime import datetime
 from dotenv import load_dotenv
 from app.db.database import get_db
 from app.core.auth import get_current_user
+from app.datasets.append import append_dataset_rows
+from app.datasets.blob_cache import adopt_blob, invalidate
+from app.analytics.cache import save_cached_analytics
+from app.analytics.frame_cache import invalidate as invalidate_frames
+from app.analytics.loader import load_dataset_sketch_async
+from app.analytics.sketches import sketch_analytics
+from app.datasets.columnar import SIDECAR_FORMAT, has_sidecar, read_sidecar_rows, remove_sidecar
+from app.datasets.ingest import frame_records, ingest_dataset_file, raw_file_path, save_upload
+from app.datasets.models import UploadSessionCreate, UploadSessionComplete
+from app.datasets.storage import get_storage, open_dataset_file, storage_for, storage_key
+from app.datasets.upload_sessions import (
+    assemble_chunks, discard_session, expire_sessions, save_chunk, session_expired
+)
+from app.config import MAX_UPLOAD_BYTES, UPLOAD_SESSION_MAX_CHUNK_BYTES
+from app.core.concurrency import run_analytics
+from fastapi.concurrency import run_in_threadpool
 
 load_dotenv()
 
-# Configure Cloudinary
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET")
-)
-
 router = APIRouter(prefix="/datasets", tags=["Datasets"])
 
+MAX_PREVIEW_LIMIT = 1000
+
 @router.post("/upload")
 async def upload_dataset(
     file: UploadFile = File(...),
     current_user: str = Depends(get_current_user)
 ):
     """Upload a dataset file"""
+    local_path = None
+    dataset_id = None
     try:
         # Validate file type
         if not file.filename.endswith(('.csv', '.xlsx')):
             raise HTTPException(status_code=400, detail="Only CSV and Excel files are supported")
 
-        # Read and validate file size
-        content = await file.read()
-        MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
-        if len(content) > MAX_FILE_SIZE:
-            raise HTTPException(status_code=400, detail="File too large. Maximum size is 10MB")
-
         # Generate unique ID
         dataset_id = str(uuid.uuid4())
 
-        # Upload to Cloudinary as raw file
-        upload_result = cloudinary.uploader.upload(
-            content,
-            resource_type="raw",
-            public_id=f"insightx/datasets/{dataset_id}",
-            original_filename=file.filename,
-            overwrite=True
+        # Stream the upload to local storage in chunks, hashing as it goes
+        local_path = raw_file_path(dataset_id, file.filename)
+        file_size, file_hash = await run_in_threadpool(save_upload, file.file, local_path)
+
+        return await _register_dataset(dataset_id, local_path, file.filename, file_size, file_hash, current_user)
+
+    except HTTPException:
+        _discard_partial_upload(dataset_id, local_path)
+        raise
+    except Exception as e:
+        print(f"Upload error: {e}")
+        _discard_partial_upload(dataset_id, local_path)
+        raise HTTPException(status_code=500, detail="Failed to upload dataset")
+
+
+async def _register_dataset(dataset_id: str, local_path: str, filename: str, file_size: int, file_hash: str, current_user: str):
+    """Convert a raw file already on local disk, hand it to the storage backend and record its metadata"""
+    # Count rows and build the columnar sidecar chunk by chunk, off the event loop
+    ingested = await run_analytics(ingest_dataset_file, dataset_id, local_path, filename)
+
+    storage = get_storage()
+    file_url = await run_in_threadpool(storage.save, dataset_id, local_path, filename)
+
+    # Keep the local copy as the blob cache entry so the first load skips the download
+    if storage.remote:
+        try:
+            adopt_blob(dataset_id, file_hash, local_path)
+        except Exception as e:
+            print(f"Blob cache warning: {e}")
+
+    # Save dataset metadata to MongoDB
+    db = get_db()
+    datasets = db.datasets
+
+    sidecar = ingested["sidecar_path"]
+    dataset_doc = {
+        "dataset_id": dataset_id,
+        "user_email": current_user,
+        "filename": filename,
+        "file_url": file_url,        # Cloudinary URL or local path
+        "file_path": file_url,       # Keep for compatibility
+        "storage_backend": storage.name,
+        "uploaded_at": datetime.utcnow(),
+        "row_count": ingested["row_count"],
+        "column_count": len(ingested["columns"]),
+        "columns": ingested["columns"],
+        "schema": ingested["schema"],
+        "file_size": file_size,
+        "content_hash": file_hash,
+        "sidecar_path": sidecar,
+        "sidecar_format": SIDECAR_FORMAT if sidecar else None,
+        "duplicate_rows": ingested["duplicate_rows"],
+        "row_groups": ingested["row_groups"]
+    }
+
+    await run_in_threadpool(datasets.insert_one, dataset_doc)
+
+    # Kept out of the dataset document so listing datasets stays small
+    preview_doc = {"dataset_id": dataset_id, **ingested["preview"]}
+    await run_in_threadpool(db.dataset_previews.insert_one, preview_doc)
+
+    return {
+        "message": "Dataset uploaded successfully",
+        "dataset_id": dataset_id,
+        "filename": filename,
+        "rows": ingested["row_count"],
+        "columns": len(ingested["columns"])
+    }
+
+
+def _discard_partial_upload(dataset_id, local_path):
+    if local_path and os.path.exists(local_path):
+        os.remove(local_path)
+    if dataset_id:
+        remove_sidecar({"dataset_id": dataset_id})
+
+
+@router.post("/uploads")
+def create_upload_session(
+    request_data: UploadSessionCreate,
+    current_user: str = Depends(get_current_user)
+):
+    """Start a resumable chunked upload"""
+    if not request_data.filename.endswith(('.csv', '.xlsx')):
+        raise HTTPException(status_code=400, detail="Only CSV and Excel files are supported")
+
+    if MAX_UPLOAD_BYTES and request_data.total_size and request_data.total_size > MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File too large. Maximum size is {MAX_UPLOAD_BYTES // (1024 * 1024)}MB"
         )
-        file_url = upload_result["secure_url"]
 
-        # Load dataframe from content in memory
-        import io
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(io.BytesIO(content))
-        else:
-            df = pd.read_excel(io.BytesIO(content))
+    # Abandoned sessions are cleared out whenever a new one starts
+    try:
+        expire_sessions(get_db().upload_sessions)
+    except Exception as e:
+        print(f"Upload session cleanup skipped: {e}")
+
+    upload_id = str(uuid.uuid4())
+    now = datetime.utcnow()
+    get_db().upload_sessions.insert_one({
+        "upload_id": upload_id,
+        "user_email": current_user,
+        "filename": request_data.filename,
+        "total_size": request_data.total_size,
+        "chunks": {},
+        "created_at": now,
+        "updated_at": now
+    })
+
+    return {
+        "upload_id": upload_id,
+        "filename": request_data.filename,
+        "max_chunk_size": UPLOAD_SESSION_MAX_CHUNK_BYTES
+    }
+
+
+def _get_upload_session(upload_id: str, current_user: str) -> dict:
+    session = get_db().upload_sessions.find_one({
+        "upload_id": upload_id,
+        "user_email": current_user
+    })
+
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+
+    if session_expired(session):
+        discard_session(upload_id)
+        get_db().upload_sessions.delete_one({"upload_id": upload_id})
+        raise HTTPException(status_code=404, detail="Upload session expired")
+
+    return session
+
+
+@router.get("/uploads/{upload_id}")
+def get_upload_session(
+    upload_id: str,
+    current_user: str = Depends(get_current_user)
+):
+    """List the chunks received so far, so an interrupted upload can resume"""
+    session = _get_upload_session(upload_id, current_user)
+    chunks = session.get("chunks", {})
+
+    return {
+        "upload_id": upload_id,
+        "filename": session["filename"],
+        "total_size": session.get("total_size"),
+        "received_chunks": sorted(int(index) for index in chunks),
+        "received_bytes": sum(chunk["size"] for chunk in chunks.values())
+    }
+
+
+@router.put("/uploads/{upload_id}/chunks/{index}")
+async def upload_chunk(
+    upload_id: str,
+    index: int,
+    request: Request,
+    x_chunk_sha256: str = Header(...),
+    current_user: str = Depends(get_current_user)
+):
+    """Store one numbered chunk, verified against its SHA-256 checksum"""
+    await run_in_threadpool(_get_upload_session, upload_id, current_user)
 
-        # Save dataset metadata to MongoDB
-        db = get_db()
-        datasets = db.datasets
+    if index < 0:
+        raise HTTPException(status_code=400, detail="Chunk index must be non-negative")
 
-        dataset_doc = {
-            "dataset_id": dataset_id,
-            "user_email": current_user,
-            "filename": file.filename,
-            "file_url": file_url,        # Cloudinary URL
-            "file_path": file_url,       # Keep for compatibility
-            "uploaded_at": datetime.utcnow(),
-            "row_count": len(df),
-            "column_count": len(df.columns),
-            "columns": df.columns.tolist(),
-            "file_size": len(content)
-        }
+    content_length = request.headers.get("content-length")
+    if content_length and int(content_length) > UPLOAD_SESSION_MAX_CHUNK_BYTES:
+        raise HTTPException(status_code=400, detail="Chunk too large")
 
-        datasets.insert_one(dataset_doc)
+    data = await request.body()
+    if len(data) > UPLOAD_SESSION_MAX_CHUNK_BYTES:
+        raise HTTPException(status_code=400, detail="Chunk too large")
 
-        return {
-            "message": "Dataset uploaded successfully",
-            "dataset_id": dataset_id,
-            "filename": file.filename,
-            "rows": len(df),
-            "columns": len(df.columns)
-        }
+    chunk = await run_in_threadpool(save_chunk, upload_id, index, data, x_chunk_sha256)
+    await run_in_threadpool(
+        get_db().upload_sessions.update_one,
+        {"upload_id": upload_id, "user_email": current_user},
+        {"$set": {f"chunks.{index}": chunk, "updated_at": datetime.utcnow()}}
+    )
+
+    return {"upload_id": upload_id, "index": index, **chunk}
+
+
+@router.post("/uploads/{upload_id}/complete")
+async def complete_upload_session(
+    upload_id: str,
+    request_data: UploadSessionComplete,
+    current_user: str = Depends(get_current_user)
+):
+    """Assemble the uploaded chunks and register the result as a dataset"""
+    session = await run_in_threadpool(_get_upload_session, upload_id, current_user)
+
+    received = session.get("chunks", {})
+    missing = [i for i in range(request_data.chunk_count) if str(i) not in received]
+    if request_data.chunk_count < 1 or missing:
+        raise HTTPException(status_code=400, detail=f"Missing chunks: {missing[:20]}")
+    # Chunks past chunk_count mean the client and server disagree on the file
+    unexpected = sorted(int(index) for index in received if int(index) >= request_data.chunk_count)
+    if unexpected:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Received chunks beyond chunk_count {request_data.chunk_count}: {unexpected[:20]}"
+        )
+
+    dataset_id = str(uuid.uuid4())
+    local_path = raw_file_path(dataset_id, session["filename"])
+    try:
+        file_size, file_hash = await run_in_threadpool(
+            assemble_chunks, upload_id, request_data.chunk_count, local_path
+        )
+        if request_data.sha256 and file_hash != request_data.sha256.lower():
+            raise HTTPException(status_code=400, detail="Checksum mismatch for assembled file")
+
+        result = await _register_dataset(
+            dataset_id, local_path, session["filename"], file_size, file_hash, current_user
+        )
 
     except HTTPException:
+        _discard_partial_upload(dataset_id, local_path)
         raise
     except Exception as e:
-        print(f"Upload error: {e}")
-        raise HTTPException(status_code=500, detail="Failed to upload dataset")
+        print(f"Upload completion error: {e}")
+        _discard_partial_upload(dataset_id, local_path)
+        raise HTTPException(status_code=500, detail="Failed to complete upload")
+
+    # The chunks are no longer needed once the dataset exists
+    discard_session(upload_id)
+    await run_in_threadpool(get_db().upload_sessions.delete_one, {"upload_id": upload_id})
+
+    return result
+
+
+@router.delete("/uploads/{upload_id}")
+def abort_upload_session(
+    upload_id: str,
+    current_user: str = Depends(get_current_user)
+):
+    """Abandon a chunked upload and delete its stored chunks"""
+    _get_upload_session(upload_id, current_user)
+
+    discard_session(upload_id)
+    get_db().upload_sessions.delete_one({"upload_id": upload_id})
+
+    return {"message": "Upload session aborted"}
 
 
 @router.get("/")
@@ -117,12 +318,69 @@ def get_user_datasets(current_user: str = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail="Failed to retrieve datasets")
 
 
+@router.post("/{dataset_id}/append")
+async def append_to_dataset(
+    dataset_id: str,
+    file: UploadFile = File(...),
+    current_user: str = Depends(get_current_user)
+):
+    """Add the rows of a CSV with the dataset's columns to an existing CSV dataset"""
+    if not file.filename.endswith('.csv'):
+        raise HTTPException(status_code=400, detail="Only CSV rows can be appended to CSV datasets")
+
+    db = get_db()
+    local_path = raw_file_path(f"{dataset_id}-append-{uuid.uuid4()}", file.filename)
+    try:
+        await run_in_threadpool(save_upload, file.file, local_path)
+        updates = await run_analytics(append_dataset_rows, db.datasets, dataset_id, current_user, local_path)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Append error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to append rows")
+    finally:
+        if os.path.exists(local_path):
+            os.remove(local_path)
+
+    # Cached frames and analytics describe the previous version
+    invalidate_frames(dataset_id)
+    await run_in_threadpool(db.analytics_cache.delete_many, {"dataset_id": dataset_id})
+
+    # Datasets summarized from their sketches get the new summary from the merged sketch
+    # straight away; others are reanalysed on the next summary request
+    try:
+        sketched = await load_dataset_sketch_async(dataset_id, current_user, db)
+        if sketched is not None:
+            sketch, metadata = sketched
+            analytics = await run_analytics(sketch_analytics, dataset_id, sketch, metadata)
+            await run_in_threadpool(save_cached_analytics, db, dataset_id, current_user, analytics)
+    except Exception as e:
+        print(f"Analytics refresh skipped for {dataset_id}: {e}")
+
+    return {
+        "message": "Rows appended successfully",
+        "dataset_id": dataset_id,
+        "rows_appended": updates["rows_appended"],
+        "rows": updates["row_count"],
+        "duplicate_rows": updates["duplicate_rows"]
+    }
+
+
 @router.get("/{dataset_id}/preview")
 def get_dataset_preview(
     dataset_id: str,
+    offset: int = 0,
+    limit: int = 10,
+    sample: bool = False,
     current_user: str = Depends(get_current_user)
 ):
-    """Get a preview of the dataset"""
+    """Get a preview of the dataset, or one page of its rows"""
+    if offset < 0 or limit < 1 or limit > MAX_PREVIEW_LIMIT:
+        raise HTTPException(
+            status_code=400,
+            detail=f"offset must be >= 0 and limit between 1 and {MAX_PREVIEW_LIMIT}"
+        )
+
     try:
         db = get_db()
         datasets = db.datasets
@@ -135,28 +393,39 @@ def get_dataset_preview(
         if not dataset:
             raise HTTPException(status_code=404, detail="Dataset not found")
 
-        # Load from Cloudinary URL
-        import requests
-        import io
-
-        file_url = dataset.get("file_url") or dataset.get("file_path")
-        response = requests.get(file_url)
-        response.raise_for_status()
-
-        if dataset["filename"].endswith('.csv'):
-            df = pd.read_csv(io.BytesIO(response.content), nrows=10)
+        snapshot = db.dataset_previews.find_one({"dataset_id": dataset_id}, {"_id": 0})
+        sample = bool(sample and snapshot and snapshot.get("sample") is not None)
+
+        if sample:
+            columns, data = snapshot["columns"], snapshot["sample"][:limit]
+        elif snapshot and offset + limit <= len(snapshot["head"]):
+            columns, data = snapshot["columns"], snapshot["head"][offset:offset + limit]
+        elif has_sidecar(dataset):
+            # Only the record batches covering the page are read
+            df = read_sidecar_rows(dataset["sidecar_path"], offset, limit, dataset.get("row_groups"))
+            columns, data = df.columns.tolist(), frame_records(df)
         else:
-            df = pd.read_excel(io.BytesIO(response.content), nrows=10)
+            # Datasets uploaded before snapshots existed: parse just the requested rows
+            file_content = open_dataset_file(dataset)
+            skiprows = range(1, offset + 1) if offset else None
 
-        df = df.where(pd.notnull(df), None)
+            if dataset["filename"].endswith('.csv'):
+                df = pd.read_csv(file_content, skiprows=skiprows, nrows=limit)
+            else:
+                df = pd.read_excel(file_content, skiprows=skiprows, nrows=limit)
+
+            columns, data = df.columns.tolist(), frame_records(df)
 
         return {
             "dataset_id": dataset_id,
-            "columns": df.columns.tolist(),
-            "data": df.to_dict('records'),
-            "preview_rows": len(df),
+            "columns": columns,
+            "data": data,
+            "preview_rows": len(data),
             "total_rows": dataset.get("row_count", 0),
-            "filename": dataset["filename"]
+            "filename": dataset["filename"],
+            "offset": 0 if sample else offset,
+            "limit": limit,
+            "sample": sample
         }
 
     except HTTPException:
@@ -184,16 +453,20 @@ def delete_dataset(
         if not dataset:
             raise HTTPException(status_code=404, detail="Dataset not found")
 
-        # Delete from Cloudinary
+        # Delete the raw file from its storage backend
+        storage = storage_for(dataset)
         try:
-            cloudinary.uploader.destroy(
-                f"insightx/datasets/{dataset_id}",
-                resource_type="raw"
-            )
+            storage.delete(storage_key(dataset), dataset.get("file_url") or dataset.get("file_path"))
         except Exception as e:
-            print(f"Cloudinary delete warning: {e}")
+            print(f"{storage.name.capitalize()} delete warning: {e}")
+
+        # Drop any locally cached copies
+        invalidate(dataset_id)
+        invalidate_frames(dataset_id)
+        remove_sidecar(dataset)
 
         # Delete from MongoDB
+        db.dataset_previews.delete_one({"dataset_id": dataset_id})
         result = datasets.delete_one({
             "dataset_id": dataset_id,
             "user_email": current_user
@@ -0,0 +1,153 @@
+# app/datasets/schema.py
+
+import warnings
+import numpy as np
+import pandas as pd
+from app.datasets.columnar import BOOL_VALUES
+
+# Distinct values tracked per column before the cardinality becomes a lower bound
+CARDINALITY_CAP = 10000
+
+# Text columns at or below this many distinct values are treated as categorical
+CATEGORICAL_MAX_CARDINALITY = 100
+
+# Values sampled from a text column when checking whether it holds dates
+DATETIME_SAMPLE_SIZE = 1000
+
+_LOGICAL_TYPES = {"int64": "integer", "float64": "float", "bool": "boolean"}
+
+
+def infer_csv_schema(path: str, chunk_rows: int):
+    """One streaming pass over a CSV deciding each column's type the way read_csv plus
+    coerce_numeric_columns would on the whole file, with null counts and cardinality.
+
+    Returns (schema, row count).
+    """
+    stats = {}
+    total_rows = 0
+
+    for chunk in pd.read_csv(path, dtype=str, chunksize=chunk_rows):
+        total_rows += len(chunk)
+        for col in chunk.columns:
+            col_stats = stats.setdefault(col, {
+                "non_null": 0, "numeric": 0, "integral": True, "boolean": True,
+                "distinct": np.empty(0, dtype=np.uint64), "capped": False, "sample": None
+            })
+            values = chunk[col].dropna()
+            converted = pd.to_numeric(values, errors="coerce")
+
+            col_stats["non_null"] += len(values)
+            col_stats["numeric"] += int(converted.notna().sum())
+            # Like read_csv, only plain digit strings make an integer column
+            col_stats["integral"] = col_stats["integral"] and bool(
+                values[converted.notna()].str.fullmatch(r"\s*[+-]?\d+\s*").all()
+            )
+            col_stats["boolean"] = col_stats["boolean"] and bool(values.isin(BOOL_VALUES.keys()).all())
+
+            if not col_stats["capped"]:
+                hashes = pd.util.hash_array(values.to_numpy(dtype=object))
+                col_stats["distinct"] = np.union1d(col_stats["distinct"], hashes)
+                if len(col_stats["distinct"]) > CARDINALITY_CAP:
+                    col_stats["distinct"] = col_stats["distinct"][:CARDINALITY_CAP]
+                    col_stats["capped"] = True
+
+            if col_stats["sample"] is None and len(values):
+                col_stats["sample"] = values.iloc[:DATETIME_SAMPLE_SIZE]
+
+    schema = []
+    for col, col_stats in stats.items():
+        fully_numeric = col_stats["numeric"] == col_stats["non_null"]
+        if fully_numeric or col_stats["numeric"] / max(total_rows, 1) > 0.7:
+            # Missing or unparseable values become NaN, which forces float
+            has_nan = col_stats["numeric"] < total_rows
+            dtype = "int64" if col_stats["integral"] and not has_nan else "float64"
+            null_count = total_rows - col_stats["numeric"]
+        elif col_stats["boolean"] and col_stats["non_null"] == total_rows:
+            dtype = "bool"
+            null_count = 0
+        else:
+            dtype = "object"
+            null_count = total_rows - col_stats["non_null"]
+
+        cardinality = len(col_stats["distinct"])
+        schema.append(_column_schema(
+            col, dtype, null_count, cardinality, not col_stats["capped"], col_stats["sample"]
+        ))
+
+    return schema, total_rows
+
+
+def frame_schema(df: pd.DataFrame) -> list:
+    """Schema of a frame that is already parsed and typed (Excel uploads, legacy backfills)"""
+    schema = []
+    for col in df.columns:
+        series = df[col]
+        values = series.dropna()
+        schema.append(_column_schema(
+            col,
+            str(series.dtype),
+            int(len(series) - len(values)),
+            int(values.nunique()),
+            True,
+            values.iloc[:DATETIME_SAMPLE_SIZE] if series.dtype == "object" else None
+        ))
+
+    return schema
+
+
+def _column_schema(name, dtype: str, null_count: int, cardinality: int, exact: bool, sample) -> dict:
+    if dtype in _LOGICAL_TYPES:
+        logical_type = _LOGICAL_TYPES[dtype]
+    elif dtype.startswith("datetime64"):
+        logical_type = "datetime"
+    elif sample is not None and _looks_like_dates(sample):
+        logical_type = "datetime"
+    elif exact and cardinality <= CATEGORICAL_MAX_CARDINALITY:
+        logical_type = "categorical"
+    else:
+        logical_type = "text"
+
+    return {
+        "name": name,
+        "dtype": dtype,
+        "logical_type": logical_type,
+        "nullable": null_count > 0,
+        "null_count": int(null_count),
+        "cardinality": int(cardinality),
+        "cardinality_exact": bool(exact)
+    }
+
+
+def _looks_like_dates(sample: pd.Series) -> bool:
+    values = sample.astype(str)
+    # Plain numbers parse as epoch offsets; they are not dates
+    if len(values) == 0 or pd.to_numeric(values, errors="coerce").notna().any():
+        return False
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        parsed = pd.to_datetime(values, errors="coerce")
+    return bool(parsed.notna().all())
+
+
+def schema_dtypes(schema: list) -> dict:
+    """Column name -> pandas dtype the typed readers should produce"""
+    return {column["name"]: column["dtype"] for column in schema}
+
+
+def schema_fields(schema: list) -> list:
+    """(column name, dtype class) pairs for column projection, as sidecar_schema returns"""
+    fields = []
+    for column in schema:
+        dtype = column["dtype"]
+        if dtype in ("int64", "float64"):
+            dtype_class = "number"
+        elif dtype == "bool":
+            dtype_class = "bool"
+        elif dtype.startswith("datetime64"):
+            dtype_class = "datetime"
+        else:
+            dtype_class = "object"
+        fields.append((column["name"], dtype_class))
+
+    return fields
@@ -0,0 +1,229 @@
+# app/datasets/storage.py
+
+import hashlib
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+import cloudinary
+import cloudinary.uploader
+from dotenv import load_dotenv
+from app.config import LOCAL_STORAGE_DIR, STORAGE_BACKEND, UPLOAD_CHUNK_BYTES
+from app.datasets.blob_cache import adopt_blob, fetch_dataset_file, fetch_dataset_file_async
+
+load_dotenv()
+
+# Configure Cloudinary
+cloudinary.config(
+    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
+    api_key=os.getenv("CLOUDINARY_API_KEY"),
+    api_secret=os.getenv("CLOUDINARY_API_SECRET")
+)
+
+
+class StorageBackend(ABC):
+    """Where raw dataset files live once an upload has been ingested"""
+
+    name = None
+    remote = False
+
+    @abstractmethod
+    def save(self, key: str, local_path: str, filename: str) -> str:
+        """Store a file from local disk under a key (the dataset id for a first upload) and
+        return its location (path or URL)"""
+
+    @abstractmethod
+    def delete(self, key: str, location: str):
+        """Remove a stored file, by the key it was saved under and its location"""
+
+    @abstractmethod
+    def open(self, dataset: dict):
+        """Readable source (local path or buffer) for a dataset's raw file"""
+
+    async def open_async(self, dataset: dict):
+        return self.open(dataset)
+
+    def append(self, dataset: dict, rows_path: str) -> dict:
+        """Add the headerless CSV rows in rows_path to a dataset's raw CSV.
+
+        Returns the new version's location, content_hash, file_size and storage_key, plus
+        what discard_append and finish_append need. Without in-place appends the combined
+        file is rebuilt locally and stored next to the current one under a versioned key,
+        so the current version stays readable until the append is committed.
+        """
+        fd, combined_path = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(rows_path) or ".")
+        hasher = hashlib.sha256()
+        try:
+            with os.fdopen(fd, "wb") as out:
+                source = self.open(dataset)
+                last = b"\n"
+                with (open(source, "rb") if isinstance(source, str) else source) as f:
+                    for block in iter(lambda: f.read(UPLOAD_CHUNK_BYTES), b""):
+                        hasher.update(block)
+                        out.write(block)
+                        last = block[-1:]
+                if last != b"\n":
+                    hasher.update(b"\n")
+                    out.write(b"\n")
+                with open(rows_path, "rb") as f:
+                    for block in iter(lambda: f.read(UPLOAD_CHUNK_BYTES), b""):
+                        hasher.update(block)
+                        out.write(block)
+
+            digest = hasher.hexdigest()
+            file_size = os.path.getsize(combined_path)
+            key = f"{dataset['dataset_id']}.{digest[:16]}"
+            location = self.save(key, combined_path, dataset["filename"])
+            if self.remote and os.path.exists(combined_path):
+                adopt_blob(dataset["dataset_id"], digest, combined_path)
+        finally:
+            if os.path.exists(combined_path):
+                os.remove(combined_path)
+
+        return {
+            "location": location,
+            "content_hash": digest,
+            "file_size": file_size,
+            "storage_key": key,
+            "previous_key": storage_key(dataset),
+            "previous_location": _location(dataset)
+        }
+
+    def discard_append(self, dataset: dict, appended: dict):
+        """Undo an append that was not committed"""
+        self.delete(appended["storage_key"], appended["location"])
+
+    def finish_append(self, dataset: dict, appended: dict):
+        """Drop what a committed append replaced"""
+        if appended["previous_key"] != appended["storage_key"]:
+            self.delete(appended["previous_key"], appended["previous_location"])
+
+
+class LocalStorage(StorageBackend):
+    """Raw files kept on the server's own disk"""
+
+    name = "local"
+
+    def __init__(self, root: str = LOCAL_STORAGE_DIR):
+        self.root = root
+
+    def save(self, key: str, local_path: str, filename: str) -> str:
+        os.makedirs(self.root, exist_ok=True)
+        location = os.path.join(self.root, f"{key}{os.path.splitext(filename)[1]}")
+        if os.path.abspath(local_path) != os.path.abspath(location):
+            shutil.move(local_path, location)
+        return location
+
+    def delete(self, key: str, location: str):
+        try:
+            os.remove(location)
+        except FileNotFoundError:
+            pass
+
+    def open(self, dataset: dict):
+        return _location(dataset)
+
+    def append(self, dataset: dict, rows_path: str) -> dict:
+        """Append in place; local files are never checked against their content hash, so the
+        new version hash chains the old one with the new rows instead of rereading the file.
+        The previous size is kept so an uncommitted append can be truncated away."""
+        location = _location(dataset)
+        hasher = hashlib.sha256((dataset.get("content_hash") or "").encode("utf-8"))
+        with open(location, "rb+") as out:
+            out.seek(0, os.SEEK_END)
+            previous_size = out.tell()
+            if previous_size > 0:
+                out.seek(-1, os.SEEK_END)
+                if out.read(1) != b"\n":
+                    out.write(b"\n")
+            with open(rows_path, "rb") as f:
+                for block in iter(lambda: f.read(UPLOAD_CHUNK_BYTES), b""):
+                    hasher.update(block)
+                    out.write(block)
+            file_size = out.tell()
+
+        return {
+            "location": location,
+            "content_hash": hasher.hexdigest(),
+            "file_size": file_size,
+            "storage_key": storage_key(dataset),
+            "previous_size": previous_size
+        }
+
+    def discard_append(self, dataset: dict, appended: dict):
+        with open(appended["location"], "rb+") as out:
+            out.truncate(appended["previous_size"])
+
+    def finish_append(self, dataset: dict, appended: dict):
+        pass
+
+
+class CloudinaryStorage(StorageBackend):
+    """Raw files uploaded to Cloudinary, read through the local blob cache"""
+
+    name = "cloudinary"
+    remote = True
+
+    def save(self, key: str, local_path: str, filename: str) -> str:
+        # Upload as a raw file, in chunks
+        upload_result = cloudinary.uploader.upload_large(
+            local_path,
+            resource_type="raw",
+            public_id=f"insightx/datasets/{key}",
+            original_filename=filename,
+            overwrite=True
+        )
+        return upload_result["secure_url"]
+
+    def delete(self, key: str, location: str):
+        cloudinary.uploader.destroy(f"insightx/datasets/{key}", resource_type="raw")
+
+    def open(self, dataset: dict):
+        return fetch_dataset_file(dataset)
+
+    async def open_async(self, dataset: dict):
+        return await fetch_dataset_file_async(dataset)
+
+
+def _location(dataset: dict) -> str:
+    location = dataset.get("file_url") or dataset.get("file_path")
+    if not location:
+        raise ValueError("Dataset file information missing")
+    return location
+
+
+def storage_key(dataset: dict) -> str:
+    """Key a dataset's current raw file is stored under; appends to remote storage save
+    each version under its own key"""
+    return dataset.get("storage_key") or dataset["dataset_id"]
+
+
+_BACKENDS = {
+    LocalStorage.name: LocalStorage,
+    CloudinaryStorage.name: CloudinaryStorage
+}
+
+
+def get_storage(name: str = None) -> StorageBackend:
+    """Storage backend by name, defaulting to the configured STORAGE_BACKEND"""
+    name = name or STORAGE_BACKEND
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown storage backend: {name}")
+    return _BACKENDS[name]()
+
+
+def storage_for(dataset: dict) -> StorageBackend:
+    """Backend holding a dataset's raw file; records without one predate local storage"""
+    if dataset.get("storage_backend"):
+        return get_storage(dataset["storage_backend"])
+
+    location = dataset.get("file_url") or dataset.get("file_path") or ""
+    return get_storage(CloudinaryStorage.name if location.startswith("http") else LocalStorage.name)
+
+
+def open_dataset_file(dataset: dict):
+    return storage_for(dataset).open(dataset)
+
+
+async def open_dataset_file_async(dataset: dict):
+    return await storage_for(dataset).open_async(dataset)
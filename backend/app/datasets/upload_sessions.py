@@ -0,0 +1,118 @@
+# app/datasets/upload_sessions.py
+
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from app.config import MAX_UPLOAD_BYTES, UPLOAD_CHUNK_BYTES, UPLOAD_SESSION_DIR, UPLOAD_SESSION_TTL_SECONDS
+
+
+def session_dir(upload_id: str) -> str:
+    return os.path.join(UPLOAD_SESSION_DIR, upload_id)
+
+
+def _chunk_path(upload_id: str, index: int) -> str:
+    return os.path.join(session_dir(upload_id), f"{index:06d}.part")
+
+
+def save_chunk(upload_id: str, index: int, data: bytes, expected_sha256: str) -> dict:
+    """Verify a chunk against its checksum and store it atomically; re-sending a chunk replaces it"""
+    digest = hashlib.sha256(data).hexdigest()
+    if digest != expected_sha256.lower():
+        raise HTTPException(status_code=400, detail=f"Checksum mismatch for chunk {index}")
+
+    directory = session_dir(upload_id)
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, _chunk_path(upload_id, index))
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return {"size": len(data), "sha256": digest}
+
+
+def assemble_chunks(upload_id: str, chunk_count: int, dest_path: str):
+    """Concatenate chunks 0..chunk_count-1 into dest_path, hashing as it goes.
+
+    Returns (size in bytes, SHA-256 hex digest).
+    """
+    os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(dest_path) or ".")
+
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for index in range(chunk_count):
+                with open(_chunk_path(upload_id, index), "rb") as part:
+                    while True:
+                        block = part.read(UPLOAD_CHUNK_BYTES)
+                        if not block:
+                            break
+                        size += len(block)
+                        if MAX_UPLOAD_BYTES and size > MAX_UPLOAD_BYTES:
+                            raise HTTPException(
+                                status_code=400,
+                                detail=f"File too large. Maximum size is {MAX_UPLOAD_BYTES // (1024 * 1024)}MB"
+                            )
+                        hasher.update(block)
+                        out.write(block)
+        os.replace(tmp_path, dest_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return size, hasher.hexdigest()
+
+
+def discard_session(upload_id: str):
+    shutil.rmtree(session_dir(upload_id), ignore_errors=True)
+
+
+def session_expired(session: dict) -> bool:
+    """Whether a session has gone UPLOAD_SESSION_TTL_SECONDS without receiving a chunk"""
+    last_activity = session.get("updated_at") or session.get("created_at")
+    return last_activity is None or last_activity < datetime.utcnow() - timedelta(seconds=UPLOAD_SESSION_TTL_SECONDS)
+
+
+def expire_sessions(sessions) -> int:
+    """Delete idle sessions from the `sessions` collection together with their chunks, and
+    chunk directories no session owns any more (e.g. left by a crash); returns how many
+    sessions were removed"""
+    cutoff = datetime.utcnow() - timedelta(seconds=UPLOAD_SESSION_TTL_SECONDS)
+    expired = list(sessions.find(
+        {"$or": [
+            {"updated_at": {"$lt": cutoff}},
+            {"updated_at": {"$exists": False}, "created_at": {"$lt": cutoff}}
+        ]},
+        {"upload_id": 1}
+    ))
+    for session in expired:
+        discard_session(session["upload_id"])
+    if expired:
+        sessions.delete_many({"upload_id": {"$in": [session["upload_id"] for session in expired]}})
+
+    try:
+        entries = os.listdir(UPLOAD_SESSION_DIR)
+    except FileNotFoundError:
+        entries = []
+    stale_before = time.time() - UPLOAD_SESSION_TTL_SECONDS
+    for upload_id in entries:
+        directory = session_dir(upload_id)
+        try:
+            if os.path.getmtime(directory) < stale_before and not sessions.find_one({"upload_id": upload_id}):
+                discard_session(upload_id)
+        except FileNotFoundError:
+            pass
+
+    return len(expired)
@@ -12,6 +12,7 @@ from app.core.auth import get_current_user
 from app.auth.routes import router as auth_router
 from app.datasets.routes import router as dataset_router
 from app.analytics.routes import router as analytics_router
+from app.core.concurrency import shutdown as shutdown_concurrency
 
 
 app = FastAPI(
@@ -46,6 +47,11 @@ app.include_router(dataset_router)
 app.include_router(analytics_router)
 
 
+@app.on_event("shutdown")
+async def close_shared_resources():
+    await shutdown_concurrency()
+
+
 
 @app.get("/health/db")
 def db_health(current_user: str = Depends(get_current_user)):
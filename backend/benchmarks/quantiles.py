@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Numeric quantile benchmark
+
+Compares the per-column Series.quantile / median-absolute-deviation calls the analytics
+modules used to make with the batched column_stats.numeric_quantiles, on a synthetic
+frame of many numeric columns, and checks both give the same values.
+
+Run from the backend directory:
+    python benchmarks/quantiles.py --rows 200000 --columns 120
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.analytics.column_stats import numeric_quantiles  # noqa: E402
+
+
+def build_frame(rows: int, columns: int, missing: float, seed: int) -> pd.DataFrame:
+    """Mixed numeric columns: normal, skewed, integer counts, with some missing values"""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(columns):
+        kind = i % 3
+        if kind == 0:
+            values = rng.normal(50, 15, rows)
+        elif kind == 1:
+            values = rng.lognormal(3, 1, rows)
+        else:
+            values = rng.poisson(20, rows).astype(np.float64)
+        values[rng.random(rows) < missing] = np.nan
+        data[f"col_{i}"] = values
+    return pd.DataFrame(data)
+
+
+def per_column_quantiles(df: pd.DataFrame) -> pd.DataFrame:
+    """The previous approach: one sort per column and statistic"""
+    results = {}
+    for col in df.columns:
+        series = df[col].dropna()
+        median = series.median()
+        results[col] = {
+            "p25": series.quantile(0.25),
+            "p50": median,
+            "p75": series.quantile(0.75),
+            "mad": (series - median).abs().median()
+        }
+    return pd.DataFrame.from_dict(results, orient="index")
+
+
+def best_of(repeats: int, func, *args):
+    """Fastest wall time over `repeats` runs and the last result"""
+    best = float("inf")
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--columns", type=int, default=120)
+    parser.add_argument("--missing", type=float, default=0.05, help="share of missing values per column")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    df = build_frame(args.rows, args.columns, args.missing, args.seed)
+    print(f"Frame: {args.rows} rows x {args.columns} numeric columns, {args.missing:.0%} missing")
+
+    per_column_time, expected = best_of(args.repeats, per_column_quantiles, df)
+    batched_time, actual = best_of(args.repeats, numeric_quantiles, df, df.columns)
+
+    matches = np.allclose(
+        expected[["p25", "p50", "p75", "mad"]].to_numpy(),
+        actual[["p25", "p50", "p75", "mad"]].to_numpy(),
+        equal_nan=True
+    )
+
+    print(f"Per-column quantiles:      {per_column_time:.3f}s")
+    print(f"Batched numeric_quantiles: {batched_time:.3f}s ({per_column_time / batched_time:.1f}x)")
+    print(f"Results match:             {matches}")
+    return 0 if matches else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -186,6 +186,69 @@ class InsightXTester:
             self.log_test("Dataset Endpoints", "FAIL", 
                         f"Dataset request failed: {e}")
 
+    def test_append_endpoint(self):
+        """Upload a small CSV, append rows to it and check a row that breaks its schema is rejected"""
+        dataset_id = None
+        try:
+            csv_data = "id,name,score\n1,alpha,1.5\n2,beta,2.5\n3,gamma,3.5\n"
+            response = self.session.post(f"{BASE_URL}/datasets/upload",
+                                       files={"file": ("append_test.csv", csv_data, "text/csv")},
+                                       timeout=30)
+            if response.status_code != 200:
+                self.log_test("Append Rows", "FAIL",
+                            f"Test dataset upload returned {response.status_code}")
+                return
+            dataset_id = response.json().get("dataset_id")
+
+            rows = "id,name,score\n4,delta,4.5\n1,alpha,1.5\n"
+            response = self.session.post(f"{BASE_URL}/datasets/{dataset_id}/append",
+                                       files={"file": ("rows.csv", rows, "text/csv")},
+                                       timeout=30)
+            if response.status_code == 200 and response.json().get("rows") == 5:
+                result = response.json()
+                self.log_test("Append Rows", "PASS",
+                            f"Appended {result.get('rows_appended')} rows, "
+                            f"{result.get('duplicate_rows')} duplicate")
+            else:
+                self.log_test("Append Rows", "FAIL",
+                            f"Append returned {response.status_code}: {response.text[:200]}")
+                return
+
+            # 5 stored rows; the summary analyses 4, since cleaning drops the appended duplicate
+            before = self.dataset_state(dataset_id)
+            bad_rows = "id,name,score\nfive,epsilon,5.5\n"
+            response = self.session.post(f"{BASE_URL}/datasets/{dataset_id}/append",
+                                       files={"file": ("bad_rows.csv", bad_rows, "text/csv")},
+                                       timeout=30)
+            after = self.dataset_state(dataset_id)
+            if response.status_code == 400 and before == after == (5, 4):
+                self.log_test("Append Schema Check", "PASS",
+                            "Rows that do not fit the schema are rejected")
+            else:
+                self.log_test("Append Schema Check", "FAIL",
+                            f"Bad rows returned {response.status_code}, "
+                            f"(rows, analysed rows) went from {before} to {after}")
+
+        except requests.exceptions.RequestException as e:
+            self.log_test("Append Rows", "FAIL",
+                        f"Append request failed: {e}")
+        finally:
+            if dataset_id:
+                try:
+                    self.session.delete(f"{BASE_URL}/datasets/{dataset_id}", timeout=10)
+                except requests.exceptions.RequestException:
+                    pass
+
+    def dataset_state(self, dataset_id):
+        """(stored row count, analysed row count) of a dataset, None where unavailable"""
+        datasets = self.session.get(f"{BASE_URL}/datasets/", timeout=10)
+        rows = None
+        if datasets.status_code == 200:
+            rows = next((d.get("rows") for d in datasets.json() if d.get("dataset_id") == dataset_id), None)
+        summary = self.session.get(f"{BASE_URL}/analytics/{dataset_id}/summary", timeout=30)
+        total_rows = summary.json().get("summary", {}).get("total_rows") if summary.status_code == 200 else None
+        return rows, total_rows
+
     def test_analytics_endpoint(self, dataset_id):
         """Test analytics endpoint with a specific dataset"""
         try:
@@ -313,6 +376,7 @@ class InsightXTester:
         # Dataset and analytics tests
         if login_ok:
             self.test_dataset_endpoints()
+            self.test_append_endpoint()
         
         # File structure test
         self.check_file_structure()
@@ -341,6 +341,29 @@ export const getCorrelationAnalysis = async (datasetId) => {
   }
 };
 
+export const getCorrelationBlock = async (datasetId, rowBlock, colBlock) => {
+  try {
+    // Validate dataset ID format
+    const uuidRegex = /^[0-9a-f]{8}-[0-9a-f]{4}-[1-5][0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}$/i;
+    if (!uuidRegex.test(datasetId)) {
+      throw new Error('Invalid dataset ID');
+    }
+    
+    const response = await api.get(`/analytics/${datasetId}/correlation/blocks`, {
+      params: { row_block: rowBlock, col_block: colBlock }
+    });
+    return response.data;
+  } catch (error) {
+    console.error('Get correlation block error:', error.response?.data || error.message);
+    
+    if (error.response?.status === 404) {
+      throw new Error('Dataset not found');
+    }
+    
+    throw new Error('Failed to load correlation block');
+  }
+};
+
 export const getOutlierAnalysis = async (datasetId) => {
   try {
     // Validate dataset ID format
@@ -125,7 +125,7 @@ function AnalyticsDashboard({ dataset, onBack }) {
         {activeTab === 'correlations' && (
           <div className="correlations-tab">
             {analytics.correlation_analysis ? (
-              <CorrelationMatrix correlationData={analytics.correlation_analysis} />
+              <CorrelationMatrix correlationData={analytics.correlation_analysis} datasetId={dataset._id} />
             ) : (
               <div className="loading-message">Loading correlation analysis...</div>
             )}
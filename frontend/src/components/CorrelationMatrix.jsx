@@ -1,8 +1,51 @@
-import { useMemo } from 'react';
+import { useEffect, useMemo, useState } from 'react';
+import { getCorrelationBlock } from '../api/api';
 import './CorrelationMatrix.css';
 
-const CorrelationMatrix = ({ correlationData }) => {
-  const { correlation_matrix, strong_correlations, correlation_summary } = correlationData || {};
+const CorrelationMatrix = ({ correlationData, datasetId }) => {
+  const {
+    correlation_matrix,
+    correlation_matrix_compact,
+    correlation_blocks,
+    strong_correlations,
+    correlation_summary
+  } = correlationData || {};
+
+  // Very wide datasets send no matrix at all; it is fetched one block of columns at a time
+  const [page, setPage] = useState({ row: 0, col: 0 });
+  const [block, setBlock] = useState(null);
+  const [blockError, setBlockError] = useState(null);
+
+  useEffect(() => {
+    setPage({ row: 0, col: 0 });
+    setBlock(null);
+  }, [datasetId, correlation_blocks]);
+
+  useEffect(() => {
+    if (!correlation_blocks || !datasetId) return;
+
+    let cancelled = false;
+    setBlockError(null);
+    getCorrelationBlock(datasetId, page.row, page.col)
+      .then((data) => {
+        if (!cancelled) setBlock(data);
+      })
+      .catch((error) => {
+        if (!cancelled) setBlockError(error.message);
+      });
+
+    return () => {
+      cancelled = true;
+    };
+  }, [datasetId, correlation_blocks, page]);
+
+  const movePage = (axis, step) => {
+    const last = (correlation_blocks?.blocks_per_side || 1) - 1;
+    setPage((current) => ({
+      ...current,
+      [axis]: Math.min(Math.max(current[axis] + step, 0), last)
+    }));
+  };
 
   const getCorrelationStrength = (absValue) => {
     if (absValue >= 0.9) return 'very-strong';
@@ -26,21 +69,32 @@ const CorrelationMatrix = ({ correlationData }) => {
 
   const matrixData = useMemo(() => {
     try {
-      if (!correlation_matrix) {
-        return null;
-      }
+      // Wide datasets only send the compact form: column names plus one value list per row
+      let rowColumns = [];
+      let colColumns = [];
+      let valueAt = () => null;
 
-      const columns = Object.keys(correlation_matrix);
+      if (correlation_matrix && Object.keys(correlation_matrix).length > 0) {
+        rowColumns = colColumns = Object.keys(correlation_matrix);
+        valueAt = (i, j) => correlation_matrix[rowColumns[i]]?.[colColumns[j]];
+      } else if (correlation_matrix_compact?.columns?.length > 0) {
+        rowColumns = colColumns = correlation_matrix_compact.columns;
+        valueAt = (i, j) => correlation_matrix_compact.values?.[i]?.[j];
+      } else if (correlation_blocks && block) {
+        rowColumns = block.row_columns;
+        colColumns = block.col_columns;
+        valueAt = (i, j) => block.values?.[i]?.[j];
+      }
 
-      if (columns.length === 0) {
+      if (rowColumns.length === 0 || colColumns.length === 0) {
         return null;
       }
 
       const matrix = [];
 
-      columns.forEach((col1, i) => {
-        columns.forEach((col2, j) => {
-          const value = correlation_matrix[col1]?.[col2];
+      rowColumns.forEach((col1, i) => {
+        colColumns.forEach((col2, j) => {
+          const value = valueAt(i, j);
 
           if (value !== null && value !== undefined) {
             matrix.push({
@@ -55,16 +109,26 @@ const CorrelationMatrix = ({ correlationData }) => {
         });
       });
 
-      return { matrix, columns };
+      return { matrix, rowColumns, colColumns, valueAt };
 
     } catch (error) {
       console.error("Correlation matrix error:", error);
       return null;
     }
-  }, [correlation_matrix]);
+  }, [correlation_matrix, correlation_matrix_compact, correlation_blocks, block]);
 
   console.log("MATRIX DATA:", matrixData)
   console.log("RAW CORRELATION MATRIX:", correlation_matrix)
+  if (correlation_blocks && !matrixData) {
+    return (
+      <div className="correlation-matrix-empty">
+        <div className="empty-icon">{blockError ? '❌' : '📊'}</div>
+        <h3>{blockError ? 'Error Loading Correlation Matrix' : 'Loading Correlation Matrix'}</h3>
+        <p>{blockError || `Fetching the first block of ${correlation_blocks.columns?.length} numeric columns...`}</p>
+      </div>
+    );
+  }
+
   if (!matrixData || !matrixData.matrix || matrixData.matrix.length === 0) {
   return (
         <div className="correlation-matrix-empty">
@@ -75,7 +139,11 @@ const CorrelationMatrix = ({ correlationData }) => {
     );
   }
 
-  const { matrix, columns } = matrixData;
+  const { rowColumns, colColumns, valueAt } = matrixData;
+  const blockColumns = correlation_blocks?.block_columns || 1;
+  const totalColumns = correlation_blocks?.columns?.length || 0;
+  const blockRange = (index) =>
+    `${index * blockColumns + 1}–${Math.min((index + 1) * blockColumns, totalColumns)}`;
 
   try {
     return (
@@ -101,16 +169,31 @@ const CorrelationMatrix = ({ correlationData }) => {
           </div>
         </div>
 
+        {correlation_blocks && (
+          <div className="correlation-block-nav">
+            <span>
+              Rows {blockRange(page.row)} × columns {blockRange(page.col)} of {totalColumns}
+            </span>
+            <div className="block-nav-buttons">
+              <button onClick={() => movePage('row', -1)} disabled={page.row === 0}>↑ Rows</button>
+              <button onClick={() => movePage('row', 1)} disabled={page.row >= correlation_blocks.blocks_per_side - 1}>↓ Rows</button>
+              <button onClick={() => movePage('col', -1)} disabled={page.col === 0}>← Columns</button>
+              <button onClick={() => movePage('col', 1)} disabled={page.col >= correlation_blocks.blocks_per_side - 1}>→ Columns</button>
+            </div>
+            {blockError && <span className="block-nav-error">{blockError}</span>}
+          </div>
+        )}
+
         <div className="correlation-matrix">
         <div className="column-labels">
-          {columns.map((col, index) => (
+          {colColumns.map((col, index) => (
             <div key={index} className="column-label">
               {col}
             </div>
           ))}
         </div>
 
-        {columns.map((row, rowIndex) => (
+        {rowColumns.map((row, rowIndex) => (
           <div key={rowIndex} className="matrix-row">
 
             <div className="row-label">
@@ -118,8 +201,8 @@ const CorrelationMatrix = ({ correlationData }) => {
             </div>
 
             <div className="matrix-cells">
-              {columns.map((col, colIndex) => {
-                const value = correlation_matrix[row]?.[col]
+              {colColumns.map((col, colIndex) => {
+                const value = valueAt(rowIndex, colIndex)
 
                 return (
                   <div
@@ -36,7 +36,7 @@ function DatasetTabs({ dataset, analytics, loading }) {
       case 'charts':
         return <ChartSection analytics={analytics} />
       case 'correlations':
-        return <CorrelationsTab analytics={analytics} />
+        return <CorrelationsTab analytics={analytics} datasetId={dataset?._id} />
       case 'outliers':
         return <OutliersTab analytics={analytics} />
       case 'data':
@@ -200,7 +200,7 @@ function OverviewTab({ dataset, analytics }) {
 }
 
 export default DatasetTabs
-function CorrelationsTab({ analytics }) {
+function CorrelationsTab({ analytics, datasetId }) {
 
   if (!analytics) {
     return (
@@ -221,6 +221,7 @@ function CorrelationsTab({ analytics }) {
       {/* Always try rendering matrix */}
       <CorrelationMatrix
         correlationData={analytics?.correlation_analysis}
+        datasetId={datasetId}
       />
 
       {/* Categorical Associations */}